@@ -0,0 +1,80 @@
+"""Declarative achievement rules and their incremental evaluation.
+
+Each rule watches one counter: "points", "streak" and "history" rules unlock
+at a threshold, "message" rules test the latest message. A counter's rules
+are only evaluated when that counter changed since the previous check, and
+earned titles are skipped through a set lookup, so a typical message checks
+a handful of rules instead of all of them.
+"""
+from collections import namedtuple
+
+AchievementRule = namedtuple("AchievementRule", "title description points icon counter threshold condition")
+
+THRESHOLD_COUNTERS = ("points", "streak", "history")
+
+GRATITUDE_PHRASES = ["thank you", "thanks", "appreciate"]
+CREATIVE_WORDS = ["imagine", "create", "story", "idea", "draw", "invent", "design", "art"]
+EMOJI_LIST = ["😊", "😄", "🙂", "👍", "❤️", "😁", "🎉", "👋", "😃"]
+
+
+def _threshold(title, description, points, icon, counter, threshold):
+    return AchievementRule(title, description, points, icon, counter, threshold, None)
+
+
+def _message(title, description, points, icon, condition):
+    return AchievementRule(title, description, points, icon, "message", None, condition)
+
+
+# Evaluation follows this order, so points earned by an earlier unlock count towards later rules
+ACHIEVEMENT_RULES = [
+    _threshold("Beginner Communicator", "Earn 100 points through conversations", 20, "🥉", "points", 100),
+    _threshold("Intermediate Communicator", "Earn 500 points through conversations", 50, "🥈", "points", 500),
+    _threshold("Advanced Communicator", "Earn 1000 points through conversations", 100, "🥇", "points", 1000),
+    _threshold("3-Day Streak", "Chat with the bot for 3 consecutive days", 15, "🔥", "streak", 3),
+    _threshold("Weekly Streak", "Chat with the bot for 7 consecutive days", 30, "🌟", "streak", 7),
+    _threshold("Monthly Dedication", "Chat with the bot for 30 consecutive days", 100, "🏅", "streak", 30),
+    _threshold("Conversation Starter", "Have 10 exchanges with the bot", 15, "🗣️", "history", 10),
+    _threshold("Regular Chatter", "Have 50 exchanges with the bot", 30, "💬", "history", 50),
+    _threshold("Chatting Expert", "Have 100 exchanges with the bot", 50, "👑", "history", 100),
+    _message("Gratitude Expert", "Express thanks to the bot", 10, "🙏",
+             lambda text, lowered: any(phrase in lowered for phrase in GRATITUDE_PHRASES)),
+    _message("Deep Thinker", "Send a detailed, thoughtful message", 20, "🧠",
+             lambda text, lowered: len(text) > 100),
+    _message("Creative Mind", "Engage in creative conversation", 15, "🎨",
+             lambda text, lowered: any(word in lowered for word in CREATIVE_WORDS)),
+    _message("Curious Learner", "Ask meaningful questions", 15, "❓",
+             lambda text, lowered: "?" in text),
+    _message("Emoji Expert", "Express yourself with emojis", 10, "😎",
+             lambda text, lowered: any(emoji in text for emoji in EMOJI_LIST)),
+]
+
+RULES_BY_COUNTER = {}
+for _rule in ACHIEVEMENT_RULES:
+    RULES_BY_COUNTER.setdefault(_rule.counter, []).append(_rule)
+for _counter in THRESHOLD_COUNTERS:
+    RULES_BY_COUNTER[_counter].sort(key=lambda rule: rule.threshold)
+
+
+def check_achievements(get_counter, earned_titles, last_seen, unlock, message=None):
+    """Call unlock(rule) for every rule that is newly met.
+
+    get_counter(name) reads a live counter value (unlocks can change "points"
+    mid-check). last_seen maps counter names to the values seen at the
+    previous check and is updated in place; unlock is expected to add the
+    title to earned_titles.
+    """
+    for counter in THRESHOLD_COUNTERS:
+        if last_seen.get(counter) == get_counter(counter):
+            continue
+        for rule in RULES_BY_COUNTER[counter]:
+            if get_counter(counter) < rule.threshold:
+                break  # Thresholds are sorted, so nothing further can be met yet
+            if rule.title not in earned_titles:
+                unlock(rule)
+        last_seen[counter] = get_counter(counter)
+
+    if message:
+        lowered = message.lower()
+        for rule in RULES_BY_COUNTER["message"]:
+            if rule.title not in earned_titles and rule.condition(message, lowered):
+                unlock(rule)
@@ -1,14 +1,28 @@
 import streamlit as st
 import pandas as pd
 import hashlib
-import json
 import os
 import time
 import random
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
-from src.helper import voice_input, llm_model_object, text_to_speech
+from src.helper import stream_llm_response, response_cache, speech_cache
+from src.speech_jobs import submit_speech, first_audio_stats
+from src.voice_capture import start_voice_capture
+from src.user_store import get_user_store
+from src import chat_store
+from src.chat_context import clear_summary
+from src.sentiment import analyze_sentiment, get_lexicon
+from src.achievements import check_achievements
+from src.mood_series import get_mood_series
+from src.history_index import HistoryIndex
+from src.themes import THEMES, theme_css, background_url
+from src.turn_pipeline import TurnPipeline
+from src.write_behind import get_write_behind
+from src.json_store import read_json, update_json, update_json_optimistic
+from src.user_profile import get_profile_cache, load_profile, summarize_moods, add_mood
+from src import shared_cache
 
 # Initialize session state variables if they don't exist
 if 'logged_in' not in st.session_state:
@@ -17,6 +31,12 @@ if 'username' not in st.session_state:
     st.session_state.username = ""
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'history_has_older' not in st.session_state:
+    st.session_state.history_has_older = False
+if 'history_total' not in st.session_state:
+    st.session_state.history_total = 0
+if 'history_user_total' not in st.session_state:
+    st.session_state.history_user_total = 0
 if 'points' not in st.session_state:
     st.session_state.points = 0
 if 'badges' not in st.session_state:
@@ -27,108 +47,63 @@ if 'last_interaction' not in st.session_state:
     st.session_state.last_interaction = None
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Chat"
-if 'mood_data' not in st.session_state:
-    st.session_state.mood_data = []
+if 'mood_summary' not in st.session_state:
+    st.session_state.mood_summary = summarize_moods([])
 if 'achievements' not in st.session_state:
     st.session_state.achievements = []
+if 'earned_titles' not in st.session_state:
+    st.session_state.earned_titles = set()
+if 'achievement_counters' not in st.session_state:
+    st.session_state.achievement_counters = {}
 if 'theme' not in st.session_state:
     st.session_state.theme = "default"
 if 'user_input' not in st.session_state:
     st.session_state.user_input = ""
 if 'input_method' not in st.session_state:
     st.session_state.input_method = "Text"
+if 'speech_job' not in st.session_state:
+    st.session_state.speech_job = None
+if 'voice_job' not in st.session_state:
+    st.session_state.voice_job = None
+if 'turn_timings' not in st.session_state:
+    st.session_state.turn_timings = {}
+if 'history_index' not in st.session_state:
+    st.session_state.history_index = None
 
 # File paths for data storage
-USERS_DB = "data/users.json"
+USERS_DB = "data/users.db"
 CHAT_HISTORY_DIR = "data/chat_history"
 MOOD_DATA_DIR = "data/mood_data"
 ACHIEVEMENT_DIR = "data/achievements"
 
+# Number of chat messages loaded and rendered at a time on the Chat page
+HISTORY_PAGE_SIZE = 50
+HISTORY_RESULTS_PER_PAGE = 20
+
+# Usernames (comma-separated) that get the Admin page with cache and latency stats
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+
 # Create directories if they don't exist
 os.makedirs(os.path.dirname(USERS_DB), exist_ok=True)
 os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
 os.makedirs(MOOD_DATA_DIR, exist_ok=True)
 os.makedirs(ACHIEVEMENT_DIR, exist_ok=True)
 
-# Initialize users database if it doesn't exist
-if not os.path.exists(USERS_DB):
-    with open(USERS_DB, "w") as f:
-        json.dump({}, f)
+# Open the users database (imports a legacy data/users.json on first run)
+users_store = get_user_store(USERS_DB)
 
-# Background images and themes
-THEMES = {
-    "default": {
-        "primary_color": "#4CAF50",
-        "background": "url('https://images.unsplash.com/photo-1557682250-33bd709cbe85?q=80&w=2000')",
-        "card_bg": "rgba(255, 255, 255, 0.8)",
-        "user_bubble": "#dcf8c6",
-        "bot_bubble": "#f1f0f0",
-        "accent_color": "#FF5722",
-    },
-    "space": {
-        "primary_color": "#3F51B5",
-        "background": "url('https://images.unsplash.com/photo-1534796636912-3b95b3ab5986?q=80&w=2000')",
-        "card_bg": "rgba(0, 0, 20, 0.7)",
-        "user_bubble": "#4CAF50",
-        "bot_bubble": "#7986CB",
-        "accent_color": "#FF9800",
-    },
-    "ocean": {
-        "primary_color": "#039BE5",
-        "background": "url('https://images.unsplash.com/photo-1518837695005-2083093ee35b?q=80&w=2000')",
-        "card_bg": "rgba(255, 255, 255, 0.7)",
-        "user_bubble": "#80DEEA",
-        "bot_bubble": "#B3E5FC",
-        "accent_color": "#FF5722",
-    },
-    "forest": {
-        "primary_color": "#388E3C",
-        "background": "url('https://images.unsplash.com/photo-1448375240586-882707db888b?q=80&w=2000')",
-        "card_bg": "rgba(255, 255, 255, 0.8)",
-        "user_bubble": "#C5E1A5",
-        "bot_bubble": "#DCEDC8",
-        "accent_color": "#FF9800",
-    },
-    "sunset": {
-        "primary_color": "#E64A19",
-        "background": "url('https://images.unsplash.com/photo-1530508777238-14544088c3ed?q=80&w=2000')",
-        "card_bg": "rgba(255, 255, 255, 0.7)",
-        "user_bubble": "#FFCCBC",
-        "bot_bubble": "#FFECB3",
-        "accent_color": "#673AB7",
-    }
-}
+# Per-turn state (mood log, achievements, user row) is written in batches by a background flusher
+write_behind = get_write_behind()
 
-# Sentiment analysis helper function (simplified)
-def analyze_sentiment(text):
-    positive_words = ["happy", "good", "great", "awesome", "excellent", "love", "like", "thanks", "thank", "please", "help", "nice", "wonderful", "fantastic", "amazing", "joy", "glad", "positive"]
-    negative_words = ["sad", "bad", "terrible", "awful", "hate", "dislike", "angry", "mad", "upset", "unhappy", "disappointed", "negative", "worse", "worst", "horrible"]
-    
-    positive_count = sum(1 for word in positive_words if word in text.lower())
-    negative_count = sum(1 for word in negative_words if word in text.lower())
-    
-    score = positive_count - negative_count
-    
-    if score > 2:
-        return "very_positive", 5
-    elif score > 0:
-        return "positive", 4
-    elif score == 0:
-        return "neutral", 3
-    elif score > -3:
-        return "negative", 2
-    else:
-        return "very_negative", 1
+# Login bundles (user row, recent history, mood summary, achievements), stored in the users DB and cached per process
+profile_cache = get_profile_cache()
 
 # Helper functions for user management
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def save_user(username, password):
-    with open(USERS_DB, "r") as f:
-        users = json.load(f)
-    
-    users[username] = {
+    return users_store.create_user(username, {
         "password_hash": hash_password(password),
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "points": 0,
@@ -137,93 +112,157 @@ def save_user(username, password):
         "last_interaction": None,
         "theme": "default",
         "achievements": []
-    }
-    
-    with open(USERS_DB, "w") as f:
-        json.dump(users, f)
+    })
 
 def authenticate(username, password):
-    with open(USERS_DB, "r") as f:
-        users = json.load(f)
+    # A cached bundle is kept in step with every write, so it beats the (possibly not yet flushed) DB row
+    user = profile_cache.peek_user(username)
+    if user is None:
+        # Another session of this user may still have changes waiting to be written
+        write_behind.flush(username)
+        user = users_store.get_user(username)
     
-    if username in users and users[username]["password_hash"] == hash_password(password):
-        st.session_state.points = users[username].get("points", 0)
-        st.session_state.badges = users[username].get("badges", [])
-        st.session_state.streak = users[username].get("streak", 0)
-        st.session_state.last_interaction = users[username].get("last_interaction")
-        st.session_state.theme = users[username].get("theme", "default")
-        st.session_state.achievements = users[username].get("achievements", [])
+    if user is not None and user["password_hash"] == hash_password(password):
+        st.session_state.authenticated_user = user
+        st.session_state.points = user.get("points", 0)
+        st.session_state.badges = user.get("badges", [])
+        st.session_state.streak = user.get("streak", 0)
+        st.session_state.last_interaction = user.get("last_interaction")
+        st.session_state.theme = user.get("theme", "default")
+        st.session_state.achievements = user.get("achievements", [])
         return True
     return False
 
+def user_data_fields():
+    # Copies, since the row is written later from the flusher thread
+    return dict(
+        points=st.session_state.points,
+        badges=list(st.session_state.badges),
+        streak=st.session_state.streak,
+        last_interaction=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        theme=st.session_state.theme,
+        achievements=list(st.session_state.achievements)
+    )
+
+def write_user_fields(username, fields):
+    users_store.update_user(username, **fields)
+
 def update_user_data():
-    with open(USERS_DB, "r") as f:
-        users = json.load(f)
-    
-    if st.session_state.username in users:
-        users[st.session_state.username]["points"] = st.session_state.points
-        users[st.session_state.username]["badges"] = st.session_state.badges
-        users[st.session_state.username]["streak"] = st.session_state.streak
-        users[st.session_state.username]["last_interaction"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        users[st.session_state.username]["theme"] = st.session_state.theme
-        users[st.session_state.username]["achievements"] = st.session_state.achievements
-        
-        with open(USERS_DB, "w") as f:
-            json.dump(users, f)
+    if st.session_state.username:
+        fields = user_data_fields()
+        write_behind.update("user", st.session_state.username, fields, write_user_fields)
+        profile_cache.note_user(st.session_state.username, fields)
+
+def write_profile_bundle(username, bundle):
+    # Called by the write-behind flusher; None drops the stored bundle, so the next login rebuilds it from the files
+    users_store.put_bundle(username, bundle)
+
+def save_profile_bundle(username):
+    # The cached bundle has every change noted so far; without one (evicted or invalidated) the stored one is stale
+    write_behind.replace("bundle", username, profile_cache.stored(username), write_profile_bundle)
 
-# Chat history management
-def save_chat_history():
+# Chat history management (append-only log, see chat_store)
+def index_saved_messages(*messages):
+    if st.session_state.history_index is not None:
+        for message in messages:
+            st.session_state.history_index.add(message)
+
+def delete_chat_message(message):
+    st.session_state.chat_history = [m for m in st.session_state.chat_history if m["id"] != message["id"]]
+    st.session_state.history_total -= 1
+    if message["role"] == "user":
+        st.session_state.history_user_total -= 1
+    if st.session_state.history_index is not None:
+        st.session_state.history_index.remove(message["id"])
     if st.session_state.username:
-        history_file = f"{CHAT_HISTORY_DIR}/{st.session_state.username}_history.json"
-        with open(history_file, "w") as f:
-            json.dump(st.session_state.chat_history, f)
+        chat_store.delete_message(st.session_state.username, message["id"], CHAT_HISTORY_DIR)
+        profile_cache.invalidate(st.session_state.username)
+        save_profile_bundle(st.session_state.username)
 
-def load_chat_history():
+def clear_chat_history():
+    st.session_state.chat_history = []
+    st.session_state.history_has_older = False
+    st.session_state.history_total = 0
+    st.session_state.history_user_total = 0
+    st.session_state.history_index = None
     if st.session_state.username:
-        history_file = f"{CHAT_HISTORY_DIR}/{st.session_state.username}_history.json"
-        if os.path.exists(history_file):
-            with open(history_file, "r") as f:
-                st.session_state.chat_history = json.load(f)
-        else:
-            st.session_state.chat_history = []
+        chat_store.clear_history(st.session_state.username, CHAT_HISTORY_DIR)
+        profile_cache.invalidate(st.session_state.username)
+        save_profile_bundle(st.session_state.username)
+        clear_summary(st.session_state.username)
+
+# Per-user caches shared across sessions; version is profile_cache.version(username), bumped on every write
+@shared_cache.data()
+def full_chat_history(username, version):
+    return chat_store.load_history(username, history_dir=CHAT_HISTORY_DIR)
+
+@shared_cache.data()
+def chat_history_csv(username, version):
+    chat_history = full_chat_history(username, version)
+    return pd.DataFrame(chat_history).to_csv(index=False) if chat_history else None
+
+@shared_cache.data()
+def mood_data_csv(username, version):
+    # Read from disk, so the caller flushes the user's pending mood records first
+    mood_data = read_json(os.path.join(MOOD_DATA_DIR, f"{username}_mood.json"), default=[])
+    return pd.DataFrame(mood_data).to_csv(index=False) if mood_data else None
+
+def load_full_chat_history():
+    username = st.session_state.username
+    return full_chat_history(username, profile_cache.version(username))
+
+def get_history_index():
+    # Built from the full log once per session, then kept in step by save/delete
+    if st.session_state.history_index is None:
+        st.session_state.history_index = HistoryIndex(load_full_chat_history())
+    return st.session_state.history_index
+
+def load_older_chat_history():
+    if st.session_state.username and st.session_state.chat_history:
+        older, st.session_state.history_has_older = chat_store.read_page(
+            st.session_state.username,
+            before_id=st.session_state.chat_history[0]["id"],
+            limit=HISTORY_PAGE_SIZE,
+            history_dir=CHAT_HISTORY_DIR
+        )
+        st.session_state.chat_history = older + st.session_state.chat_history
 
 # Mood data management
-def save_mood_data(sentiment, score):
+def write_mood_records(username, records):
+    # Called by the write-behind flusher with every record queued since the last flush
+    # Read and rewrite under the file's lock, so two sessions' records can't overwrite each other
+    update_json(f"{MOOD_DATA_DIR}/{username}_mood.json", lambda mood_data: mood_data + records, default=[])
+
+def save_mood_data(sentiment, score, message_id):
     if st.session_state.username:
-        mood_file = f"{MOOD_DATA_DIR}/{st.session_state.username}_mood.json"
-        
-        if os.path.exists(mood_file):
-            with open(mood_file, "r") as f:
-                mood_data = json.load(f)
-        else:
-            mood_data = []
-        
-        mood_data.append({
+        # The scored message's id ties the record to its message, so rescore_moods can replace it
+        record = {
+            "id": message_id,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "sentiment": sentiment,
             "score": score
-        })
-        
-        with open(mood_file, "w") as f:
-            json.dump(mood_data, f)
+        }
+        st.session_state.mood_summary = add_mood(st.session_state.mood_summary, record)
+        write_behind.append("mood", st.session_state.username, [record], write_mood_records)
+        profile_cache.note_mood(st.session_state.username, record)
         
-        st.session_state.mood_data = mood_data
+        # Extend the chart series in place if it's built; otherwise the Stats page reads the whole log
+        series = get_mood_series(st.session_state.username)
+        if series is not None:
+            series.append(record["timestamp"], record["score"])
 
-def load_mood_data():
-    if st.session_state.username:
-        mood_file = f"{MOOD_DATA_DIR}/{st.session_state.username}_mood.json"
-        if os.path.exists(mood_file):
-            with open(mood_file, "r") as f:
-                st.session_state.mood_data = json.load(f)
-        else:
-            st.session_state.mood_data = []
+def load_mood_series(username):
+    # Built from the mood log the first time this process draws the user's chart, then extended by save_mood_data
+    series = get_mood_series(username)
+    if series is None:
+        write_behind.flush(username)
+        series = get_mood_series(username, read_json(os.path.join(MOOD_DATA_DIR, f"{username}_mood.json"), default=[]))
+    return series
 
 # Achievement management
 def add_achievement(title, description, points, icon="🏆"):
     if st.session_state.username:
-        achievement_exists = any(a["title"] == title for a in st.session_state.achievements)
-        
-        if not achievement_exists:
+        if title not in st.session_state.earned_titles:
             achievement = {
                 "title": title,
                 "description": description,
@@ -233,11 +272,11 @@ def add_achievement(title, description, points, icon="🏆"):
             }
             
             st.session_state.achievements.append(achievement)
+            st.session_state.earned_titles.add(title)
             st.session_state.points += points
             
-            achievement_file = f"{ACHIEVEMENT_DIR}/{st.session_state.username}_achievements.json"
-            with open(achievement_file, "w") as f:
-                json.dump(st.session_state.achievements, f)
+            write_behind.replace("achievements", st.session_state.username, list(st.session_state.achievements), write_achievements)
+            profile_cache.note_achievements(st.session_state.username, st.session_state.achievements)
             
             st.balloons()
             st.success(f"🎉 New Achievement Unlocked: {title} (+{points} points)")
@@ -246,25 +285,22 @@ def add_achievement(title, description, points, icon="🏆"):
     
     return False
 
-def load_achievements():
-    if st.session_state.username:
-        achievement_file = f"{ACHIEVEMENT_DIR}/{st.session_state.username}_achievements.json"
-        if os.path.exists(achievement_file):
-            with open(achievement_file, "r") as f:
-                st.session_state.achievements = json.load(f)
-        else:
-            st.session_state.achievements = []
+def write_achievements(username, achievements):
+    # Keep anything another session of this user unlocked since we loaded the list
+    titles = {a["title"] for a in achievements}
+    update_json_optimistic(
+        f"{ACHIEVEMENT_DIR}/{username}_achievements.json",
+        lambda stored: achievements + [a for a in stored if a["title"] not in titles],
+        default=[]
+    )
 
 # Gamification functions
-def award_points(message, response):
+def award_points(message, response, sentiment):
     points = 5  # Base points for interaction
     
     if len(message) > 20:
         points += 3
     
-    sentiment, score = analyze_sentiment(message)
-    save_mood_data(sentiment, score)
-    
     if sentiment in ["positive", "very_positive"]:
         points += 2
     
@@ -295,275 +331,41 @@ def award_points(message, response):
     return points
 
 def check_for_achievements(message=None):
-    if st.session_state.points >= 100 and not any(a["title"] == "Beginner Communicator" for a in st.session_state.achievements):
-        add_achievement("Beginner Communicator", "Earn 100 points through conversations", 20, "🥉")
-    
-    if st.session_state.points >= 500 and not any(a["title"] == "Intermediate Communicator" for a in st.session_state.achievements):
-        add_achievement("Intermediate Communicator", "Earn 500 points through conversations", 50, "🥈")
-    
-    if st.session_state.points >= 1000 and not any(a["title"] == "Advanced Communicator" for a in st.session_state.achievements):
-        add_achievement("Advanced Communicator", "Earn 1000 points through conversations", 100, "🥇")
-    
-    if st.session_state.streak >= 3 and not any(a["title"] == "3-Day Streak" for a in st.session_state.achievements):
-        add_achievement("3-Day Streak", "Chat with the bot for 3 consecutive days", 15, "🔥")
-    
-    if st.session_state.streak >= 7 and not any(a["title"] == "Weekly Streak" for a in st.session_state.achievements):
-        add_achievement("Weekly Streak", "Chat with the bot for 7 consecutive days", 30, "🌟")
-    
-    if st.session_state.streak >= 30 and not any(a["title"] == "Monthly Dedication" for a in st.session_state.achievements):
-        add_achievement("Monthly Dedication", "Chat with the bot for 30 consecutive days", 100, "🏅")
-    
-    if len(st.session_state.chat_history) >= 10 and not any(a["title"] == "Conversation Starter" for a in st.session_state.achievements):
-        add_achievement("Conversation Starter", "Have 10 exchanges with the bot", 15, "🗣️")
-    
-    if len(st.session_state.chat_history) >= 50 and not any(a["title"] == "Regular Chatter" for a in st.session_state.achievements):
-        add_achievement("Regular Chatter", "Have 50 exchanges with the bot", 30, "💬")
-    
-    if len(st.session_state.chat_history) >= 100 and not any(a["title"] == "Chatting Expert" for a in st.session_state.achievements):
-        add_achievement("Chatting Expert", "Have 100 exchanges with the bot", 50, "👑")
-    
-    if message:
-        if any(word in message.lower() for word in ["thank you", "thanks", "appreciate"]) and not any(a["title"] == "Gratitude Expert" for a in st.session_state.achievements):
-            add_achievement("Gratitude Expert", "Express thanks to the bot", 10, "🙏")
-        
-        if len(message) > 100 and not any(a["title"] == "Deep Thinker" for a in st.session_state.achievements):
-            add_achievement("Deep Thinker", "Send a detailed, thoughtful message", 20, "🧠")
-        
-        creative_words = ["imagine", "create", "story", "idea", "draw", "invent", "design", "art"]
-        if any(word in message.lower() for word in creative_words) and not any(a["title"] == "Creative Mind" for a in st.session_state.achievements):
-            add_achievement("Creative Mind", "Engage in creative conversation", 15, "🎨")
-        
-        if "?" in message and not any(a["title"] == "Curious Learner" for a in st.session_state.achievements):
-            add_achievement("Curious Learner", "Ask meaningful questions", 15, "❓")
-        
-        emoji_list = ["😊", "😄", "🙂", "👍", "❤️", "😁", "🎉", "👋", "😃"]
-        if any(emoji in message for emoji in emoji_list) and not any(a["title"] == "Emoji Expert" for a in st.session_state.achievements):
-            add_achievement("Emoji Expert", "Express yourself with emojis", 10, "😎")
+    counters = {
+        "points": lambda: st.session_state.points,
+        "streak": lambda: st.session_state.streak,
+        "history": lambda: st.session_state.history_total,
+    }
+    check_achievements(
+        lambda counter: counters[counter](),
+        st.session_state.earned_titles,
+        st.session_state.achievement_counters,
+        lambda rule: add_achievement(rule.title, rule.description, rule.points, rule.icon),
+        message
+    )
 
 def load_all_user_data():
-    load_chat_history()
-    load_mood_data()
-    load_achievements()
+    # One read of the stored bundle, or none when this process has it cached; reuses authenticate's row
+    username = st.session_state.username
+    write_behind.flush(username)
+    bundle = load_profile(
+        username, users_store, user=st.session_state.pop("authenticated_user", None),
+        history_dir=CHAT_HISTORY_DIR, mood_dir=MOOD_DATA_DIR, achievement_dir=ACHIEVEMENT_DIR, page_size=HISTORY_PAGE_SIZE
+    )
+    st.session_state.chat_history = bundle.history
+    st.session_state.history_has_older = bundle.has_older
+    st.session_state.history_total = bundle.history_total
+    st.session_state.history_user_total = bundle.history_user_total
+    st.session_state.history_index = None
+    st.session_state.mood_summary = bundle.mood_summary
+    st.session_state.achievements = bundle.achievements
+    st.session_state.earned_titles = {a["title"] for a in st.session_state.achievements}
+    st.session_state.achievement_counters = {}
 
 # UI Components
 def set_background():
-    theme = THEMES[st.session_state.theme]
-    st.markdown(f"""
-    <style>
-    .stApp {{
-        background: {theme["background"]};
-        background-size: cover;
-        background-attachment: fixed;
-    }}
-    .card {{
-        background-color: {theme["card_bg"]};
-        border-radius: 15px;
-        padding: 20px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        backdrop-filter: blur(10px);
-    }}
-    .stButton button {{
-        background-color: {theme["primary_color"]} !important;
-        color: white !important;
-        border-radius: 20px !important;
-        border: none !important;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.2) !important;
-        transition: all 0.3s ease !important;
-    }}
-    .stButton button:hover {{
-        transform: translateY(-2px) !important;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.3) !important;
-    }}
-    .chat-message {{
-        padding: 15px;
-        border-radius: 15px;
-        margin-bottom: 10px;
-        display: flex;
-        flex-direction: column;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        animation: fadeIn 0.5s;
-    }}
-    .user-message {{
-        background-color: {theme["user_bubble"]};
-        margin-left: 50px;
-        border-top-right-radius: 5px;
-    }}
-    .bot-message {{
-        background-color: {theme["bot_bubble"]};
-        margin-right: 50px;
-        border-top-left-radius: 5px;
-    }}
-    .message-timestamp {{
-        font-size: 0.8rem;
-        color: #888;
-        align-self: flex-end;
-    }}
-    .sidebar .stButton button {{
-        width: 100%;
-        margin-bottom: 10px;
-    }}
-    .achievement {{
-        background: linear-gradient(135deg, {theme["primary_color"]}22, {theme["accent_color"]}22);
-        border-left: 5px solid {theme["primary_color"]};
-        padding: 15px;
-        border-radius: 10px;
-        margin-bottom: 15px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        transition: transform 0.3s ease;
-    }}
-    .achievement:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-    }}
-    .badge-item {{
-        display: inline-block;
-        margin: 5px;
-        padding: 8px 15px;
-        background-color: {theme["primary_color"]};
-        color: white;
-        border-radius: 20px;
-        font-size: 0.9rem;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.2);
-        transition: all 0.3s ease;
-    }}
-    .badge-item:hover {{
-        transform: scale(1.05);
-    }}
-    .stats-box {{
-        background-color: rgba(255, 255, 255, 0.9);
-        border-radius: 12px;
-        padding: 15px;
-        margin: 5px;
-        text-align: center;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        border-left: 5px solid {theme["primary_color"]};
-        transition: all 0.3s ease;
-    }}
-    .stats-box:hover {{
-        transform: translateY(-5px);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-    }}
-    .page-title {{
-        color: {theme["primary_color"]};
-        margin-bottom: 20px;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.1);
-        font-size: 2.2rem;
-        font-weight: bold;
-    }}
-    .stTabs [data-baseweb="tab-list"] {{
-        gap: 24px;
-    }}
-    .stTabs [data-baseweb="tab"] {{
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: white;
-        border-radius: 4px 4px 0px 0px;
-        gap: 1px;
-        padding-top: 10px;
-        padding-bottom: 10px;
-        transition: all 0.3s ease;
-    }}
-    .stTabs [aria-selected="true"] {{
-        background-color: {theme["primary_color"]} !important;
-        color: white !important;
-        transform: translateY(-3px);
-    }}
-    .stProgress > div > div > div > div {{
-        background-color: {theme["primary_color"]};
-    }}
-    .points-animation {{
-        position: fixed;
-        color: {theme["accent_color"]};
-        font-weight: bold;
-        z-index: 9999;
-        animation: floatUp 2s forwards;
-    }}
-    @keyframes fadeIn {{
-        from {{ opacity: 0; transform: translateY(10px); }}
-        to {{ opacity: 1; transform: translateY(0); }}
-    }}
-    @keyframes floatUp {{
-        0% {{ opacity: 0; transform: translateY(20px); }}
-        10% {{ opacity: 1; }}
-        80% {{ opacity: 1; }}
-        100% {{ opacity: 0; transform: translateY(-50px); }}
-    }}
-    .login-form-container {{
-        transition: all 0.5s ease;
-        transform: scale(1);
-    }}
-    .login-form-container:hover {{
-        transform: scale(1.02);
-    }}
-    .input-container {{
-        position: relative;
-        margin-bottom: 20px;
-    }}
-    .input-container input {{
-        width: 100%;
-        padding: 12px 15px;
-        border: 2px solid #ddd;
-        border-radius: 10px;
-        font-size: 16px;
-        transition: all 0.3s;
-    }}
-    .input-container input:focus {{
-        border-color: {theme["primary_color"]};
-        box-shadow: 0 0 8px {theme["primary_color"]}80;
-    }}
-    .input-container label {{
-        position: absolute;
-        top: -10px;
-        left: 10px;
-        background-color: white;
-        padding: 0 5px;
-        font-size: 12px;
-        color: #555;
-    }}
-    .chat-input {{
-        border-radius: 30px !important;
-        padding: 12px 20px !important;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1) !important;
-        border: 2px solid transparent !important;
-        transition: all 0.3s ease !important;
-    }}
-    .chat-input:focus {{
-        border-color: {theme["primary_color"]} !important;
-        box-shadow: 0 2px 15px rgba(0,0,0,0.15) !important;
-    }}
-    .theme-selector {{
-        border-radius: 8px;
-        overflow: hidden;
-        transition: all 0.3s ease;
-    }}
-    .theme-selector:hover {{
-        transform: translateY(-3px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-    }}
-    .level-indicator {{
-        background: linear-gradient(90deg, {theme["primary_color"]}, {theme["accent_color"]});
-        color: white;
-        padding: 5px 15px;
-        border-radius: 20px;
-        font-weight: bold;
-        display: inline-block;
-        margin-top: 5px;
-    }}
-    .settings-option {{
-        padding: 15px;
-        margin-bottom: 10px;
-        border-radius: 10px;
-        background-color: white;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        transition: all 0.3s ease;
-    }}
-    .settings-option:hover {{
-        transform: translateY(-3px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-    }}
-    </style>
-    """, unsafe_allow_html=True)
+    # Streamlit drops elements between reruns, so the (cached) stylesheet is re-sent each run
+    st.markdown(theme_css(st.session_state.theme), unsafe_allow_html=True)
 
 def render_login_page():
     st.markdown("""
@@ -663,14 +465,10 @@ def render_login_page():
                 
                 if signup_button:
                     if new_password == confirm_password:
-                        with open(USERS_DB, "r") as f:
-                            users = json.load(f)
-                        
-                        if new_username in users:
-                            st.error("Username already exists")
-                        else:
-                            save_user(new_username, new_password)
+                        if save_user(new_username, new_password):
                             st.success("Account created successfully! Please log in.")
+                        else:
+                            st.error("Username already exists")
                     else:
                         st.error("Passwords do not match")
             
@@ -681,37 +479,135 @@ def render_login_page():
             </div>
             """, unsafe_allow_html=True)
 
-def process_user_input(user_input):
+def chat_message_html(role, content, timestamp):
+    if role == "user":
+        return f"""
+        <div class="chat-message user-message">
+            <div><strong>You:</strong> {content}</div>
+            <div class="message-timestamp">{timestamp}</div>
+        </div>
+        """
+    return f"""
+    <div class="chat-message bot-message">
+        <div><strong>KiddiChat:</strong> {content}</div>
+        <div class="message-timestamp">{timestamp}</div>
+    </div>
+    """
+
+def cancel_speech():
+    if st.session_state.speech_job is not None:
+        st.session_state.speech_job.cancel()
+        st.session_state.speech_job = None
+
+def process_user_input(user_input, chat_container=None):
+    # A new message makes the previous reply's audio moot
+    cancel_speech()
+    
+    username = st.session_state.username
+    pipeline = TurnPipeline()
+    
+    earlier_messages = list(st.session_state.chat_history)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    st.session_state.chat_history.append({
+    user_message = {
         "role": "user",
         "content": user_input,
         "timestamp": timestamp
-    })
+    }
+    st.session_state.chat_history.append(user_message)
+    st.session_state.history_total += 1
+    st.session_state.history_user_total += 1
+    
+    # Scoring the message and saving it don't depend on the reply, so they run while it streams
+    pipeline.submit("sentiment", analyze_sentiment, user_input, get_lexicon())
+    if username:
+        pipeline.submit("save_user_message", chat_store.append_messages, username, [user_message], CHAT_HISTORY_DIR)
     
-    # Generate response using the LLM model
-    bot_response = llm_model_object(user_input)
+    # Stream the response into the bot bubble so the first words show up right away
+    bot_response = ""
+    with pipeline.stage("llm"):
+        with chat_container if chat_container is not None else st.container():
+            st.markdown(chat_message_html("user", user_input, timestamp), unsafe_allow_html=True)
+            bot_bubble = st.empty()
+            for chunk in stream_llm_response(user_input, history=earlier_messages, username=username):
+                bot_response += chunk
+                bot_bubble.markdown(chat_message_html("assistant", bot_response + " ▌", ""), unsafe_allow_html=True)
     
-    st.session_state.chat_history.append({
+    bot_message = {
         "role": "assistant",
         "content": bot_response,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
+    }
+    st.session_state.chat_history.append(bot_message)
+    st.session_state.history_total += 1
     
-    # Convert response to speech
-    text_to_speech(bot_response)
+    # Convert response to speech in the background; the player attaches when it's ready
+    with pipeline.stage("tts_submit"):
+        st.session_state.speech_job = submit_speech(bot_response)
+    
+    sentiment, score = pipeline.result("sentiment")
+    if username:
+        # Ids are handed out in log order, so the reply is written after the user's message
+        pipeline.submit("save_bot_message", chat_store.append_messages, username, [bot_message], CHAT_HISTORY_DIR,
+                        after=("save_user_message",))
     
     # Award points for the interaction
-    points = award_points(user_input, bot_response)
+    with pipeline.stage("points"):
+        points = award_points(user_input, bot_response, sentiment)
     
-    # Save data
-    save_chat_history()
+    # Save data (the user row goes through the write-behind buffer)
     update_user_data()
+    pipeline.wait()
+    # After the wait, so the user's message has its id
+    save_mood_data(sentiment, score, user_message.get("id"))
+    index_saved_messages(user_message, bot_message)
+    if username:
+        profile_cache.note_messages(username, [user_message, bot_message], HISTORY_PAGE_SIZE)
+        save_profile_bundle(username)
+    st.session_state.turn_timings = pipeline.timings
+    
+    # Keep the rendered window to the latest page; older messages stay one click away
+    if len(st.session_state.chat_history) > HISTORY_PAGE_SIZE:
+        del st.session_state.chat_history[:-HISTORY_PAGE_SIZE]
+        st.session_state.history_has_older = True
     
     # Clear input and rerun
     st.session_state.user_input = ""
     st.rerun()
 
+@st.fragment(run_every=1)
+def wait_for_speech():
+    # Sentences show up as players as soon as they're synthesized, so the first can play while
+    # the rest render. No full rerun once the job finishes: that would restart a playing segment.
+    job = st.session_state.speech_job
+    if job is None:
+        return
+    for segment in job.segments():
+        st.audio(segment, format=job.mime)
+    if not job.done():
+        st.caption("🔊 Preparing audio...")
+
+@st.fragment(run_every=0.5)
+def wait_for_voice():
+    # Capture runs on a background thread; only this fragment reruns while it listens
+    job = st.session_state.voice_job
+    if job is None or job.done():
+        st.rerun()
+    st.caption("🎙️ Listening...")
+    if st.button("Stop", key="voice_cancel", use_container_width=True):
+        job.cancel()
+        st.session_state.voice_job = None
+        st.rerun()
+
+def render_speech_player():
+    job = st.session_state.speech_job
+    if job is None:
+        return
+    if job.done():
+        for segment in job.segments():
+            st.audio(segment, format=job.mime)
+    else:
+        wait_for_speech()
+
 def render_chat_page():
     st.markdown(f'<h1 class="page-title">💬 Chat with KiddiChat</h1>', unsafe_allow_html=True)
     
@@ -724,21 +620,15 @@ def render_chat_page():
     chat_container = st.container()
     
     with chat_container:
+        if st.session_state.history_has_older:
+            if st.button("⬆️ Load older messages", key="load_older"):
+                load_older_chat_history()
+                st.rerun()
+        
         for message in st.session_state.chat_history:
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <div><strong>You:</strong> {message["content"]}</div>
-                    <div class="message-timestamp">{message["timestamp"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message bot-message">
-                    <div><strong>KiddiChat:</strong> {message["content"]}</div>
-                    <div class="message-timestamp">{message["timestamp"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
+            st.markdown(chat_message_html(message["role"], message["content"], message["timestamp"]), unsafe_allow_html=True)
+        
+        render_speech_player()
     
     if input_method == "Text":
         col1, col2 = st.columns([5, 1])
@@ -754,30 +644,66 @@ def render_chat_page():
         with col2:
             if st.button("Send", use_container_width=True):
                 if user_input.strip():
-                    process_user_input(user_input)
+                    process_user_input(user_input, chat_container)
             
             if st.button("🎤", use_container_width=True, help="Switch to voice input"):
                 st.session_state.input_method = "Voice"
                 st.rerun()
     
     else:  # Voice input method
-        if st.button("Start Recording", key="voice_record", use_container_width=True):
-            with st.spinner("Listening..."):
-                voice_text = voice_input()
-                if voice_text:
-                    st.session_state.user_input = voice_text
-                    process_user_input(voice_text)
-                else:
-                    st.warning("Sorry, I didn't hear anything. Please try again.")
+        voice_job = st.session_state.voice_job
+        if voice_job is None:
+            if st.button("Start Recording", key="voice_record", use_container_width=True):
+                st.session_state.voice_job = start_voice_capture()
+                st.rerun()
+        elif voice_job.done():
+            st.session_state.voice_job = None
+            voice_text = voice_job.result()
+            if voice_text:
+                st.session_state.user_input = voice_text
+                process_user_input(voice_text, chat_container)
+            elif voice_job.error:
+                st.warning("Couldn't use the microphone. Please check it's connected and try again.")
+            else:
+                st.warning("Sorry, I didn't hear anything. Please try again.")
+        else:
+            wait_for_voice()
         
         if st.button("✏️", use_container_width=True, help="Switch to text input"):
             st.session_state.input_method = "Text"
             st.rerun()
 
+# Mood scores 1-5
+MOOD_EMOJIS = ["😢", "🙁", "😐", "🙂", "😊"]
+
+# Built once per user, data version, view and theme, and shared by every session showing it
+@shared_cache.resource(max_entries=shared_cache.USER_CACHE_MAX_ENTRIES, ttl=shared_cache.USER_CACHE_TTL_SECONDS)
+def build_mood_figure(username, version, resolution, theme, _series):
+    timestamps, scores = _series.for_display(resolution)
+    
+    fig = px.line(
+        x=timestamps,
+        y=scores,
+        color_discrete_sequence=[THEMES[theme]['primary_color']],
+        labels={'y': 'Mood Score', 'x': 'Date'},
+        title=""
+    )
+    
+    fig.update_layout(
+        hovermode="x unified",
+        xaxis_title="",
+        yaxis_title="Mood Score",
+        yaxis=dict(range=[0, 6], tickvals=[1, 2, 3, 4, 5], ticktext=MOOD_EMOJIS),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=0, b=0)
+    )
+    return fig
+
 def render_stats_page():
     st.markdown(f'<h1 class="page-title">📊 Your Stats & Progress</h1>', unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.markdown(f"""
@@ -803,9 +729,28 @@ def render_stats_page():
         st.markdown(f"""
         <div class="stats-box">
             <h3>Messages Sent</h3>
-            <h2 style="color: {THEMES[st.session_state.theme]['primary_color']};">{len([m for m in st.session_state.chat_history if m['role'] == 'user'])}</h2>
+            <h2 style="color: {THEMES[st.session_state.theme]['primary_color']};">{st.session_state.history_user_total}</h2>
             <div style="margin-top: 10px;">
-                🗣️ {len(st.session_state.chat_history)} total exchanges
+                🗣️ {st.session_state.history_total} total exchanges
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col4:
+        # From the login bundle's mood summary, so the header doesn't need the whole mood log
+        mood_summary = st.session_state.mood_summary
+        if mood_summary["count"]:
+            average = mood_summary["total"] / mood_summary["count"]
+            mood = f"{MOOD_EMOJIS[round(average) - 1]} {average:.1f}"
+            last = f"Last chat: {MOOD_EMOJIS[mood_summary['last']['score'] - 1]}"
+        else:
+            mood, last = "-", "No chats yet"
+        st.markdown(f"""
+        <div class="stats-box">
+            <h3>Average Mood</h3>
+            <h2 style="color: {THEMES[st.session_state.theme]['primary_color']};">{mood}</h2>
+            <div style="margin-top: 10px;">
+                {last}
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -815,31 +760,19 @@ def render_stats_page():
         <h2 style="margin-bottom: 20px;">😊 Your Mood Over Time</h2>
     """, unsafe_allow_html=True)
     
-    if st.session_state.mood_data:
-        mood_df = pd.DataFrame(st.session_state.mood_data)
-        mood_df['timestamp'] = pd.to_datetime(mood_df['timestamp'])
-        mood_df = mood_df.sort_values('timestamp')
-        
-        fig = px.line(
-            mood_df, 
-            x='timestamp', 
-            y='score',
-            color_discrete_sequence=[THEMES[st.session_state.theme]['primary_color']],
-            labels={'score': 'Mood Score', 'timestamp': 'Date'},
-            title=""
+    series = load_mood_series(st.session_state.username)
+    if series is not None and len(series):
+        resolution = st.radio(
+            "Show",
+            ["auto", "day", "week"],
+            format_func={"auto": "Every chat", "day": "Daily average", "week": "Weekly average"}.get,
+            horizontal=True,
+            key="mood_resolution"
         )
         
-        fig.update_layout(
-            hovermode="x unified",
-            xaxis_title="",
-            yaxis_title="Mood Score",
-            yaxis=dict(range=[0, 6], tickvals=[1, 2, 3, 4, 5], ticktext=["😢", "🙁", "😐", "🙂", "😊"]),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            margin=dict(l=0, r=0, t=0, b=0)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        username = st.session_state.username
+        figure = build_mood_figure(username, profile_cache.version(username), resolution, st.session_state.theme, series)
+        st.plotly_chart(figure, use_container_width=True)
     else:
         st.info("No mood data available yet. Start chatting to track your mood!")
     
@@ -875,7 +808,8 @@ def render_stats_page():
 def render_history_page():
     st.markdown(f'<h1 class="page-title">📜 Chat History</h1>', unsafe_allow_html=True)
     
-    if not st.session_state.chat_history:
+    history_index = get_history_index()
+    if not len(history_index):
         st.info("No chat history yet. Start chatting to see your history here!")
         return
     
@@ -885,35 +819,37 @@ def render_history_page():
     with col2:
         search_term = st.text_input("Search messages")
     
-    for i, message in enumerate(st.session_state.chat_history):
-        message_date = datetime.strptime(message["timestamp"], "%Y-%m-%d %H:%M:%S").date()
-        if date_filter and message_date != date_filter:
-            continue
-        if search_term and search_term.lower() not in message["content"].lower():
-            continue
-        
-        with st.expander(f"{message['timestamp']} - {message['role'].capitalize()}"):
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <div><strong>You:</strong> {message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message bot-message">
-                    <div><strong>KiddiChat:</strong> {message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            if st.button(f"Delete this message", key=f"delete_{i}"):
-                del st.session_state.chat_history[i]
-                save_chat_history()
-                st.rerun()
+    matches = history_index.search(on_date=date_filter, query=search_term or "")
+    if not matches:
+        st.info("No messages match your filters.")
+    else:
+        # Only the current page gets expanders and delete buttons
+        page_count = (len(matches) - 1) // HISTORY_RESULTS_PER_PAGE + 1
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        st.caption(f"{len(matches)} messages")
+        start = (page - 1) * HISTORY_RESULTS_PER_PAGE
+        for message_id in matches[start:start + HISTORY_RESULTS_PER_PAGE]:
+            message = history_index.messages[message_id]
+            with st.expander(f"{message['timestamp']} - {message['role'].capitalize()}"):
+                if message["role"] == "user":
+                    st.markdown(f"""
+                    <div class="chat-message user-message">
+                        <div><strong>You:</strong> {message["content"]}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                else:
+                    st.markdown(f"""
+                    <div class="chat-message bot-message">
+                        <div><strong>KiddiChat:</strong> {message["content"]}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                
+                if st.button(f"Delete this message", key=f"delete_{message['id']}"):
+                    delete_chat_message(message)
+                    st.rerun()
     
     if st.button("Clear All History", type="primary"):
-        st.session_state.chat_history = []
-        save_chat_history()
+        clear_chat_history()
         st.rerun()
 
 def render_settings_page():
@@ -937,7 +873,7 @@ def render_settings_page():
                     st.rerun()
                 
                 st.markdown(f"""
-                <div class="theme-selector" style="background: {THEMES[theme]['background']}; background-size: cover; height: 100px; border-radius: 8px; margin-top: 10px; border: {'3px solid ' + THEMES[theme]['primary_color'] if st.session_state.theme == theme else '1px solid #ddd'};">
+                <div class="theme-selector" style="background: url('{background_url(theme)}'); background-size: cover; height: 100px; border-radius: 8px; margin-top: 10px; border: {'3px solid ' + THEMES[theme]['primary_color'] if st.session_state.theme == theme else '1px solid #ddd'};">
                 </div>
                 """, unsafe_allow_html=True)
         
@@ -955,14 +891,12 @@ def render_settings_page():
             confirm_password = st.text_input("Confirm New Password", type="password")
             
             if st.form_submit_button("Change Password"):
-                with open(USERS_DB, "r") as f:
-                    users = json.load(f)
+                user = users_store.get_user(st.session_state.username)
                 
-                if users[st.session_state.username]["password_hash"] == hash_password(current_password):
+                if user["password_hash"] == hash_password(current_password):
                     if new_password == confirm_password:
-                        users[st.session_state.username]["password_hash"] = hash_password(new_password)
-                        with open(USERS_DB, "w") as f:
-                            json.dump(users, f)
+                        users_store.update_user(st.session_state.username, password_hash=hash_password(new_password))
+                        profile_cache.invalidate(st.session_state.username)
                         st.success("Password changed successfully!")
                     else:
                         st.error("New passwords don't match")
@@ -982,9 +916,9 @@ def render_settings_page():
         
         with col1:
             if st.button("Export Chat History"):
-                if st.session_state.chat_history:
-                    df = pd.DataFrame(st.session_state.chat_history)
-                    csv = df.to_csv(index=False)
+                username = st.session_state.username
+                csv = chat_history_csv(username, profile_cache.version(username))
+                if csv:
                     st.download_button(
                         label="Download CSV",
                         data=csv,
@@ -996,9 +930,10 @@ def render_settings_page():
         
         with col2:
             if st.button("Export Mood Data"):
-                if st.session_state.mood_data:
-                    df = pd.DataFrame(st.session_state.mood_data)
-                    csv = df.to_csv(index=False)
+                username = st.session_state.username
+                write_behind.flush(username)
+                csv = mood_data_csv(username, profile_cache.version(username))
+                if csv:
                     st.download_button(
                         label="Download CSV",
                         data=csv,
@@ -1011,11 +946,80 @@ def render_settings_page():
         st.markdown("</div>", unsafe_allow_html=True)
     
     if st.button("Logout", type="primary"):
+        cancel_speech()
+        write_behind.flush(st.session_state.username)
+        if st.session_state.voice_job is not None:
+            st.session_state.voice_job.cancel()
+            st.session_state.voice_job = None
         st.session_state.logged_in = False
         st.session_state.username = ""
         st.session_state.chat_history = []
+        st.session_state.history_has_older = False
+        st.session_state.history_index = None
         st.rerun()
 
+def is_admin():
+    return st.session_state.username in ADMIN_USERS
+
+def render_admin_page():
+    st.markdown(f'<h1 class="page-title">🛠️ Admin</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="card">
+        <h2 style="margin-bottom: 20px;">🧠 Shared Streamlit Caches</h2>
+    """, unsafe_allow_html=True)
+    st.dataframe(pd.DataFrame([
+        {"function": name, "kind": stats["kind"], "lookups": stats["lookups"],
+         "misses": stats["misses"], "hit rate": f"{stats['hit_rate']:.0%}"}
+        for name, stats in sorted(shared_cache.cache_stats().items())
+    ]), use_container_width=True, hide_index=True)
+    if st.button("Clear per-user caches"):
+        st.cache_data.clear()
+        build_mood_figure.clear()
+        st.rerun()
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="card">
+        <h2 style="margin-bottom: 20px;">📦 App Caches</h2>
+    """, unsafe_allow_html=True)
+    replies = response_cache.stats()
+    speech = speech_cache.stats()
+    profiles = profile_cache.stats()
+    st.dataframe(pd.DataFrame([
+        {"cache": "LLM replies", "entries": replies["entries"], "MB": None, "hit rate": f"{replies['hit_rate']:.0%}"},
+        {"cache": "Speech (memory)", "entries": speech["memory_entries"], "MB": speech["memory_bytes"] / 2**20,
+         "hit rate": f"{speech['hit_rate']:.0%}"},
+        {"cache": "Speech (disk)", "entries": speech["disk_entries"], "MB": speech["disk_bytes"] / 2**20, "hit rate": None},
+        {"cache": "Login bundles", "entries": profiles["users"], "MB": None, "hit rate": f"{profiles['hit_rate']:.0%}"},
+    ]), use_container_width=True, hide_index=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="card">
+        <h2 style="margin-bottom: 20px;">⏱️ Latency & Writes</h2>
+    """, unsafe_allow_html=True)
+    first_audio = first_audio_stats()
+    writes = write_behind.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("First audio p50", f"{first_audio['p50']:.2f} s" if first_audio["count"] else "–")
+        st.metric("First audio p95", f"{first_audio['p95']:.2f} s" if first_audio["count"] else "–")
+    with col2:
+        st.metric("Pending writes", writes["pending"])
+        st.metric("Files written", writes["writes"])
+    with col3:
+        st.metric("Flushes", writes["flushes"])
+        st.metric("Speech jobs sampled", first_audio["count"])
+    if st.session_state.turn_timings:
+        st.markdown("**Your last chat turn**")
+        st.dataframe(pd.DataFrame([
+            {"stage": name, "start (ms)": timing["start"] * 1000, "duration (ms)": timing["duration"] * 1000,
+             "thread": timing["thread"]}
+            for name, timing in sorted(st.session_state.turn_timings.items(), key=lambda item: item[1]["start"])
+        ]), use_container_width=True, hide_index=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
 # Main app function
 def main():
     set_background()
@@ -1061,6 +1065,10 @@ def main():
                 st.session_state.current_page = "Settings"
                 st.rerun()
             
+            if is_admin() and st.button("🛠️ Admin", use_container_width=True):
+                st.session_state.current_page = "Admin"
+                st.rerun()
+            
             st.markdown("---")
             
             if st.session_state.achievements:
@@ -1081,6 +1089,10 @@ def main():
             render_stats_page()
         elif st.session_state.current_page == "Settings":
             render_settings_page()
+        elif st.session_state.current_page == "Admin" and is_admin():
+            render_admin_page()
+        else:
+            render_chat_page()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""Per-call setup overhead of the Gemini model: fresh configure + model vs the shared registry.
+
+No request is sent to the API; only the client/model setup done before generate_content is timed.
+
+    python -m benchmarks.bench_llm_setup [iterations]
+"""
+import sys
+import time
+
+import google.generativeai as genai
+
+from src.helper import GEMINI_MODEL, GOOGLE_API_KEY, get_model
+
+
+def fresh_model():
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    get_model()  # warm the registry so only the steady state is measured
+    
+    before = time_per_call(fresh_model, iterations)
+    after = time_per_call(get_model, iterations)
+    
+    print(f"configure + GenerativeModel per call: {before * 1e6:9.1f} us")
+    print(f"shared registry lookup per call:      {after * 1e6:9.1f} us")
+    print(f"speedup: {before / after:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
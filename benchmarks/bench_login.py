@@ -0,0 +1,112 @@
+"""Login latency: separate per-file loads vs the stored and cached profile bundle.
+
+Builds one user with a long chat history and mood log in a temp dir and
+times what happens between pressing Login and the first page render:
+
+    separate   authenticate's row read, then the old load_all_user_data
+               (history page + counts, mood JSON, achievements JSON), each
+               reading the row or file again on its own
+    rebuild    load_profile with no stored bundle (first login): the same
+               reads minus the user row, then the bundle is stored
+    bundle     load_profile on a cold process cache: one SELECT of the
+               stored bundle
+    cached     load_profile again (re-login or a second tab)
+
+    python -m benchmarks.bench_login [history_messages] [mood_records]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from src import chat_store
+from src.json_store import read_json, write_json
+from src.user_profile import get_profile_cache, load_profile
+from src.user_store import UserStore
+
+RUNS = 20
+USERNAME = "kid"
+
+
+def setup(workdir, history_messages, mood_records):
+    dirs = {
+        "history_dir": os.path.join(workdir, "chat_history"),
+        "mood_dir": os.path.join(workdir, "mood_data"),
+        "achievement_dir": os.path.join(workdir, "achievements"),
+    }
+    for directory in dirs.values():
+        os.makedirs(directory, exist_ok=True)
+    store = UserStore(os.path.join(workdir, "users.db"))
+    store.create_user(USERNAME, {"password_hash": hashlib.sha256(b"pw").hexdigest(), "points": 500, "achievements": []})
+    messages = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message number {i} about school and friends",
+         "timestamp": "2024-01-01 10:00:00"}
+        for i in range(history_messages)
+    ]
+    chat_store.append_messages(USERNAME, messages, dirs["history_dir"])
+    write_json(os.path.join(dirs["mood_dir"], f"{USERNAME}_mood.json"),
+               [{"timestamp": "2024-01-01 10:00:00", "sentiment": "positive", "score": 4}] * mood_records)
+    write_json(os.path.join(dirs["achievement_dir"], f"{USERNAME}_achievements.json"),
+               [{"title": f"Badge {i}", "description": "", "date": "2024-01-01 10:00:00", "points": 10, "icon": "🏆"}
+                for i in range(14)])
+    return store, dirs
+
+
+def separate_login(store, dirs):
+    store.get_user(USERNAME)  # authenticate
+    chat_store.convert_legacy_history(USERNAME, dirs["history_dir"])
+    chat_store.read_page(USERNAME, limit=50, history_dir=dirs["history_dir"])
+    chat_store.history_counts(USERNAME, dirs["history_dir"])
+    read_json(os.path.join(dirs["mood_dir"], f"{USERNAME}_mood.json"), default=[])
+    read_json(os.path.join(dirs["achievement_dir"], f"{USERNAME}_achievements.json"), default=[])
+
+
+def drop_cached():
+    get_profile_cache().invalidate(USERNAME)
+
+
+def drop_stored(store):
+    drop_cached()
+    store.put_bundle(USERNAME, None)
+
+
+def bundle_login(store, dirs):
+    user = store.get_user(USERNAME)  # authenticate
+    load_profile(USERNAME, store, user=user, page_size=50, **dirs)
+
+
+def cached_login(store, dirs):
+    user = get_profile_cache().peek_user(USERNAME)  # authenticate, answered by the cache
+    load_profile(USERNAME, store, user=user, page_size=50, **dirs)
+
+
+def timed(fn, before=None):
+    total = 0.0
+    for _ in range(RUNS):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return total / RUNS * 1000
+
+
+def main():
+    history_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    mood_records = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as workdir:
+        store, dirs = setup(workdir, history_messages, mood_records)
+        print(f"{history_messages} messages, {mood_records} mood records")
+        results = {
+            "separate": timed(lambda: separate_login(store, dirs)),
+            "rebuild": timed(lambda: bundle_login(store, dirs), before=lambda: drop_stored(store)),
+            "bundle": timed(lambda: bundle_login(store, dirs), before=drop_cached),
+            "cached": timed(lambda: cached_login(store, dirs)),
+        }
+        for name, ms in results.items():
+            print(f"  {name:<9} {ms:8.3f} ms/login")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Throughput of the token-based sentiment scorer against the old substring scan.
+
+The second run repeats the comparison with a ~1,000-word lexicon: the substring
+scan grows with every word added, the token lookup does not.
+
+    python -m benchmarks.bench_sentiment [messages]
+"""
+import random
+import sys
+import time
+
+from src.sentiment import DEFAULT_LEXICON, Lexicon, analyze_sentiment, analyze_sentiment_batch
+
+SAMPLE_MESSAGES = [
+    "hi",
+    "thank you so much, that was an awesome story!",
+    "I am not happy today, school was terrible and my friend was mad at me",
+    "can you help me with my homework about planets please",
+    "the gladiator movie was unlikely to be good but I like it",
+    "tell me a joke",
+    "I hate broccoli, it is the worst food ever and I feel sad when mom makes it",
+    "what is the biggest animal in the ocean? I love whales and dolphins, they are amazing",
+]
+
+
+def legacy_analyze_sentiment(text):
+    positive_words = ["happy", "good", "great", "awesome", "excellent", "love", "like", "thanks", "thank", "please", "help", "nice", "wonderful", "fantastic", "amazing", "joy", "glad", "positive"]
+    negative_words = ["sad", "bad", "terrible", "awful", "hate", "dislike", "angry", "mad", "upset", "unhappy", "disappointed", "negative", "worse", "worst", "horrible"]
+    
+    positive_count = sum(1 for word in positive_words if word in text.lower())
+    negative_count = sum(1 for word in negative_words if word in text.lower())
+    
+    score = positive_count - negative_count
+    
+    if score > 2:
+        return "very_positive", 5
+    elif score > 0:
+        return "positive", 4
+    elif score == 0:
+        return "neutral", 3
+    elif score > -3:
+        return "negative", 2
+    else:
+        return "very_negative", 1
+
+
+def legacy_scan(text, positive_words, negative_words):
+    positive_count = sum(1 for word in positive_words if word in text.lower())
+    negative_count = sum(1 for word in negative_words if word in text.lower())
+    return positive_count - negative_count
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  ({count / elapsed:,.0f} msg/s)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    messages = [random.choice(SAMPLE_MESSAGES) for _ in range(count)]
+    
+    timed("legacy substring scan", lambda: [legacy_analyze_sentiment(m) for m in messages], count)
+    timed("token lookup", lambda: [analyze_sentiment(m) for m in messages], count)
+    timed("token lookup, batch API", lambda: analyze_sentiment_batch(messages), count)
+    
+    
+    extra = [f"word{i}" for i in range(1000)]
+    positive = sorted(DEFAULT_LEXICON.positive) + extra[:500]
+    negative = sorted(DEFAULT_LEXICON.negative) + extra[500:]
+    large = Lexicon(positive, negative, DEFAULT_LEXICON.negators)
+    sample = messages[:count // 100]
+    print(f"with a {len(positive) + len(negative)}-word lexicon, {len(sample)} messages:")
+    timed("legacy substring scan", lambda: [legacy_scan(m, positive, negative) for m in sample], len(sample))
+    timed("token lookup", lambda: analyze_sentiment_batch(sample, large), len(sample))
+    
+    disagreements = [m for m in SAMPLE_MESSAGES if legacy_analyze_sentiment(m) != analyze_sentiment(m)]
+    for message in disagreements:
+        print(f"  {legacy_analyze_sentiment(message)[0]:>13} -> {analyze_sentiment(message)[0]:<13} {message!r}")
+
+
+if __name__ == "__main__":
+    main()
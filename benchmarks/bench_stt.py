@@ -0,0 +1,101 @@
+"""Speech-to-text backends compared on a folder of WAV recordings.
+
+Each <name>.wav may have a <name>.txt reference transcript next to it; word
+error rate is reported for the files that do. Audio is fed to each backend's
+stream in capture-sized chunks (as voice input does), so "final" is the time
+left after the last chunk, which is the delay the user actually waits for,
+and "total" includes decoding done while the audio was coming in.
+
+    python -m benchmarks.bench_stt path/to/wavs [backends...]
+"""
+import os
+import sys
+import time
+
+import speech_recognition as sr
+
+from src.stt_backends import BACKENDS, get_backend
+
+CHUNK_FRAMES = 4096  # Same chunk size as sr.Microphone/sr.AudioFile
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance between two transcripts."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def load_fixtures(folder):
+    fixtures = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(".wav"):
+            continue
+        path = os.path.join(folder, name)
+        with sr.AudioFile(path) as source:
+            chunks = []
+            while True:
+                chunk = source.stream.read(CHUNK_FRAMES)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            rate, width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+        reference = None
+        text_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(text_path):
+            with open(text_path, "r") as f:
+                reference = f.read().strip()
+        fixtures.append((name, chunks, rate, width, reference))
+    return fixtures
+
+
+def run(backend_name, fixtures):
+    try:
+        start = time.perf_counter()
+        backend = get_backend(backend_name)
+        load_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        print(f"{backend_name}: unavailable ({e})")
+        return
+    total_ms = final_ms = 0.0
+    errors = words = 0
+    for name, chunks, rate, width, reference in fixtures:
+        start = time.perf_counter()
+        stream = backend.start_stream(rate, width)
+        for chunk in chunks:
+            stream.feed(chunk)
+        fed = time.perf_counter()
+        text = stream.finish() or ""
+        end = time.perf_counter()
+        total_ms += (end - start) * 1000
+        final_ms += (end - fed) * 1000
+        if reference is not None:
+            errors += word_errors(reference, text)
+            words += len(reference.split())
+    count = len(fixtures)
+    wer = f"{errors / words:6.1%}" if words else "   n/a"
+    print(f"{backend_name:<8} load {load_ms:8.0f} ms  total {total_ms / count:8.1f} ms/file  "
+          f"final {final_ms / count:8.1f} ms/file  WER {wer}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    fixtures = load_fixtures(sys.argv[1])
+    if not fixtures:
+        print(f"No .wav files in {sys.argv[1]}")
+        sys.exit(1)
+    print(f"{len(fixtures)} files")
+    for backend_name in sys.argv[2:] or list(BACKENDS):
+        run(backend_name, fixtures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Login and point-update latency: users.json vs the SQLite user store.
+
+Builds synthetic user bases of 10k and 100k accounts in a temp dir and times
+the operations the app performs per login and per chat turn.
+
+    python -m benchmarks.bench_user_store [user_counts...]
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.user_store import UserStore
+
+OPS = 20
+
+
+def make_users(count):
+    password_hash = hashlib.sha256(b"secret").hexdigest()
+    return {
+        f"user{i}": {
+            "password_hash": password_hash,
+            "created_at": "2024-01-01 00:00:00",
+            "points": i % 1000,
+            "badges": [],
+            "streak": i % 30,
+            "last_interaction": "2024-01-01 00:00:00",
+            "theme": "default",
+            "achievements": [],
+        }
+        for i in range(count)
+    }
+
+
+def json_login(path, username):
+    with open(path, "r") as f:
+        users = json.load(f)
+    return users.get(username)
+
+
+def json_update(path, username):
+    with open(path, "r") as f:
+        users = json.load(f)
+    users[username]["points"] += 5
+    with open(path, "w") as f:
+        json.dump(users, f)
+
+
+def timed(fn, usernames):
+    start = time.perf_counter()
+    for username in usernames:
+        fn(username)
+    return (time.perf_counter() - start) / len(usernames) * 1000
+
+
+def run(count, workdir):
+    users = make_users(count)
+    json_path = os.path.join(workdir, f"users_{count}.json")
+    with open(json_path, "w") as f:
+        json.dump(users, f)
+    store = UserStore(os.path.join(workdir, f"users_{count}.db"))
+    store.import_users(users)
+    
+    usernames = random.sample(list(users), OPS)
+    results = {
+        "json login": timed(lambda u: json_login(json_path, u), usernames),
+        "json update": timed(lambda u: json_update(json_path, u), usernames),
+        "sqlite login": timed(store.get_user, usernames),
+        "sqlite update": timed(lambda u: store.update_user(u, points=store.get_user(u)["points"] + 5), usernames),
+    }
+    print(f"{count} users")
+    for name, ms in results.items():
+        print(f"  {name:<14} {ms:10.3f} ms/op")
+
+
+def main():
+    counts = [int(n) for n in sys.argv[1:]] or [10_000, 100_000]
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in counts:
+            run(count, workdir)
+
+
+if __name__ == "__main__":
+    main()
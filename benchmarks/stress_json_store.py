@@ -0,0 +1,108 @@
+"""Multi-process stress test for concurrent user-state writes.
+
+Worker processes act as simultaneous sessions of one user and repeat what
+a flush of update_user_data and friends does: update the user row in the
+SQLite store, append to the mood log (locked read-modify-write) and add an
+achievement (optimistic write with retry). Another process keeps reading
+the JSON files. At the end every append and achievement must be present
+and no read may ever have seen a truncated file. The same workload with
+plain open("w") + json.dump writes is run first for comparison.
+
+    python -m benchmarks.stress_json_store [processes] [iterations]
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from src.json_store import read_json, update_json, update_json_optimistic
+from src.user_store import UserStore
+
+USERNAME = "stress"
+
+
+def naive_update(path, update):
+    data = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+    with open(path, "w") as f:
+        json.dump(update(data), f)
+
+
+def worker(workdir, worker_id, iterations, safe):
+    store = UserStore(os.path.join(workdir, "users.db"))
+    mood_path = os.path.join(workdir, "mood.json")
+    achievement_path = os.path.join(workdir, "achievements.json")
+    failures = 0
+    for i in range(iterations):
+        store.update_user(USERNAME, points=worker_id * iterations + i, last_interaction=f"{worker_id}:{i}")
+        record = [{"worker": worker_id, "i": i, "padding": "x" * 20}]
+        achievement = {"title": f"{worker_id}-{i}"}
+        try:
+            if safe:
+                update_json(mood_path, lambda data: data + record, default=[])
+                update_json_optimistic(achievement_path, lambda data: data + [achievement], default=[])
+            else:
+                naive_update(mood_path, lambda data: data + record)
+                naive_update(achievement_path, lambda data: data + [achievement])
+        except ValueError:
+            failures += 1  # Read a half-written file
+    return failures
+
+
+def reader(workdir, stop, results):
+    torn = reads = 0
+    while not stop.is_set():
+        for name in ("mood.json", "achievements.json"):
+            try:
+                read_json(os.path.join(workdir, name), [])
+                reads += 1
+            except ValueError:
+                torn += 1
+        time.sleep(0.001)  # A page load now and then, not a CPU hog competing with the writers
+    results.put((reads, torn))
+
+
+def run(processes, iterations, safe):
+    with tempfile.TemporaryDirectory() as workdir:
+        store = UserStore(os.path.join(workdir, "users.db"))
+        store.create_user(USERNAME, {"password_hash": "hash", "points": 0})
+        stop = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        reader_process = multiprocessing.Process(target=reader, args=(workdir, stop, results))
+        reader_process.start()
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            failures = sum(pool.starmap(worker, [(workdir, w, iterations, safe) for w in range(processes)]))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reads, torn = results.get()
+        reader_process.join()
+
+        expected = processes * iterations
+        try:
+            moods = len(read_json(os.path.join(workdir, "mood.json"), []))
+            achievements = len({a["title"] for a in read_json(os.path.join(workdir, "achievements.json"), [])})
+        except ValueError:
+            moods = achievements = "corrupt"
+        user = store.get_user(USERNAME)
+        print(f"{'json_store' if safe else 'open(w)':<10} {elapsed:6.2f} s  "
+              f"mood {moods}/{expected}  achievements {achievements}/{expected}  "
+              f"writer errors {failures}  torn reads {torn}/{reads}  user row ok {user is not None}")
+        return moods == expected and achievements == expected and failures == 0 and torn == 0
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print(f"{processes} processes x {iterations} updates")
+    run(processes, iterations, safe=False)
+    if not run(processes, iterations, safe=True):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
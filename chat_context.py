@@ -0,0 +1,140 @@
+"""Token-budgeted conversation context for multi-turn Gemini chats.
+
+The most recent turns that fit in CONTEXT_TOKEN_BUDGET are sent verbatim.
+Turns that fall out of the window are folded into a running summary once
+they add up to SUMMARY_BATCH_TOKENS; until then they ride along verbatim.
+The summary is cached per user, in memory and under data/context_summaries,
+and is only extended with new turns, never recomputed from scratch.
+
+Summarizing takes an LLM call, so it never runs before a reply: the turn
+that crosses the threshold sends the older turns verbatim and starts the
+summary on a background worker, and later turns pick up the saved result.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.json_store import read_json, write_json
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "500"))
+SUMMARY_DIR = "data/context_summaries"
+
+_summaries = {}
+_summaries_lock = threading.Lock()
+_summarizing = set()  # Usernames with a summary job running
+_generations = {}  # username -> bumped by clear_summary, so a job started before a clear doesn't save
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English; count_tokens would cost an API round-trip
+    return len(text) // 4 + 1
+
+
+def _summary_path(username):
+    return os.path.join(SUMMARY_DIR, f"{username}_summary.json")
+
+
+def load_summary(username):
+    with _summaries_lock:
+        summary = _summaries.get(username)
+        if summary is None:
+            summary = _summaries[username] = read_json(_summary_path(username), {"text": "", "through_id": -1})
+        return summary
+
+
+def save_summary(username, text, through_id):
+    summary = {"text": text, "through_id": through_id}
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    write_json(_summary_path(username), summary)
+    with _summaries_lock:
+        _summaries[username] = summary
+    return summary
+
+
+def clear_summary(username):
+    with _summaries_lock:
+        _summaries.pop(username, None)
+        _generations[username] = _generations.get(username, 0) + 1
+    if os.path.exists(_summary_path(username)):
+        os.remove(_summary_path(username))
+
+
+def split_window(messages, budget=CONTEXT_TOKEN_BUDGET):
+    """Return the index where the newest messages fitting in budget begin."""
+    used = 0
+    start = len(messages)
+    while start > 0:
+        cost = estimate_tokens(messages[start - 1]["content"])
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+    return start
+
+
+def _summarize_later(username, summary, older, summarize):
+    """Fold older into the user's summary on a worker, unless a job for the user is already running."""
+    with _summaries_lock:
+        if username in _summarizing:
+            return
+        _summarizing.add(username)
+        generation = _generations.get(username, 0)
+
+    def run():
+        try:
+            text = summarize(summary["text"], older)
+            with _summaries_lock:
+                cleared = _generations.get(username, 0) != generation
+            # Without a new summary, through_id stays put and these turns are retried by a later job
+            if text and text.strip() and not cleared:
+                save_summary(username, text, older[-1]["id"])
+        except Exception as e:
+            print(f"Could not summarize earlier turns for {username}: {e}")
+        finally:
+            with _summaries_lock:
+                _summarizing.discard(username)
+
+    _summary_executor.submit(run)
+
+
+def context_fingerprint(history):
+    """Short hash of a chat history (summary and window), for keying replies that depend on it."""
+    return hashlib.sha1(json.dumps(history, sort_keys=True).encode()).hexdigest()
+
+
+def build_history(username, messages, summarize, budget=CONTEXT_TOKEN_BUDGET, batch_tokens=SUMMARY_BATCH_TOKENS):
+    """Return Gemini chat history (role/parts dicts) for messages, oldest first.
+
+    Once enough turns have left the window to be worth a summary call,
+    summarize(previous_summary, messages) is started in the background;
+    this call still returns those turns verbatim. summarize should raise
+    (or return nothing) on failure, so the turns aren't marked summarized.
+    """
+    summary = load_summary(username) if username else {"text": "", "through_id": -1}
+    unsummarized = [m for m in messages if "id" not in m or m["id"] > summary["through_id"]]
+    start = split_window(unsummarized, budget)
+    older, recent = unsummarized[:start], unsummarized[start:]
+
+    # Without a username there is nowhere to cache a summary, so older turns just stay verbatim
+    if username and older and sum(estimate_tokens(m["content"]) for m in older) >= batch_tokens:
+        _summarize_later(username, summary, older, summarize)
+
+    history = []
+    if summary["text"]:
+        history.append({"role": "user", "parts": [f"Here is a summary of our conversation so far: {summary['text']}"]})
+        history.append({"role": "model", "parts": ["Thanks, I'll keep that in mind."]})
+    for message in older + recent:
+        role = "user" if message["role"] == "user" else "model"
+        if not history and role == "model":
+            continue  # Gemini histories have to open with a user turn
+        if history and history[-1]["role"] == role:
+            history[-1]["parts"].append(message["content"])
+        else:
+            history.append({"role": role, "parts": [message["content"]]})
+    if history and history[-1]["role"] == "user":
+        history.pop()  # An unanswered message; the next send_message is the user turn
+    return history
@@ -0,0 +1,340 @@
+"""Append-only chat history storage.
+
+Each user has a line-delimited log, data/chat_history/<user>_history.jsonl,
+holding one JSON message per line with a stable integer "id". New messages
+are appended, so a chat turn costs O(1) regardless of history length.
+Deleting a message appends its id to a tombstone file (<user>_history.deleted);
+compaction rewrites the log without deleted messages once tombstones pile up.
+
+A fixed-width offset index (<user>_history.idx) records the byte offset, id
+and role of every line, so a page of messages can be located by id with a
+binary search and read with a few seeks instead of scanning the log.
+
+Every step that writes a user's files (id allocation and appends, deletes,
+index rebuilds, compaction) and every read that combines the index with the
+log holds the user's lock (json_store.locked on the log path), so sessions,
+threads and processes writing for the same user can't interleave.
+"""
+import json
+import os
+import struct
+import sys
+
+from src.json_store import locked
+
+CHAT_HISTORY_DIR = "data/chat_history"
+
+# Compact on load once at least this many messages are deleted and they make up half the log
+COMPACT_MIN_TOMBSTONES = 50
+
+# Index record: byte offset of the line, message id, 1 if written by the user
+_INDEX_RECORD = struct.Struct("<QIB")
+
+
+def history_path(username, history_dir=CHAT_HISTORY_DIR):
+    return os.path.join(history_dir, f"{username}_history.jsonl")
+
+
+def tombstone_path(username, history_dir=CHAT_HISTORY_DIR):
+    return os.path.join(history_dir, f"{username}_history.deleted")
+
+
+def index_path(username, history_dir=CHAT_HISTORY_DIR):
+    return os.path.join(history_dir, f"{username}_history.idx")
+
+
+def legacy_history_path(username, history_dir=CHAT_HISTORY_DIR):
+    return os.path.join(history_dir, f"{username}_history.json")
+
+
+def _user_lock(username, history_dir):
+    return locked(history_path(username, history_dir))
+
+
+def _parse(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        # A torn final line from an interrupted append; everything before it is intact
+        return None
+
+
+def _read_messages(path):
+    if not os.path.exists(path):
+        return []
+    messages = []
+    with open(path, "rb") as f:
+        for line in f:
+            message = _parse(line) if line.strip() else None
+            if message is not None:
+                messages.append(message)
+    return messages
+
+
+def _load_tombstones(username, history_dir):
+    path = tombstone_path(username, history_dir)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return {int(line) for line in f if line.strip()}
+
+
+def _index_records(messages, start_offset):
+    records = []
+    lines = []
+    offset = start_offset
+    for message in messages:
+        line = (json.dumps(message) + "\n").encode()
+        records.append(_INDEX_RECORD.pack(offset, message["id"], message["role"] == "user"))
+        lines.append(line)
+        offset += len(line)
+    return b"".join(lines), b"".join(records)
+
+
+def _rebuild_index(username, history_dir):
+    messages = _read_messages(history_path(username, history_dir))
+    _, records = _index_records(messages, 0)
+    with open(index_path(username, history_dir), "wb") as f:
+        f.write(records)
+
+
+def _ensure_index(username, history_dir):
+    """Rebuild the index if it is missing or doesn't end at the last line of the log; needs the user's lock."""
+    log_file = history_path(username, history_dir)
+    idx_file = index_path(username, history_dir)
+    if not os.path.exists(log_file):
+        return
+    log_size = os.path.getsize(log_file)
+    if os.path.exists(idx_file):
+        idx_size = os.path.getsize(idx_file)
+        if idx_size == 0:
+            if log_size == 0:
+                return
+        elif idx_size % _INDEX_RECORD.size == 0:
+            with open(idx_file, "rb") as f:
+                f.seek(idx_size - _INDEX_RECORD.size)
+                offset, _, _ = _INDEX_RECORD.unpack(f.read(_INDEX_RECORD.size))
+            with open(log_file, "rb") as f:
+                f.seek(offset)
+                f.readline()
+                if f.tell() == log_size:
+                    return
+    _rebuild_index(username, history_dir)
+
+
+def _read_index(username, history_dir, start=0, stop=None):
+    """Return index records [start, stop) as (offset, id, is_user) tuples."""
+    path = index_path(username, history_dir)
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(start * _INDEX_RECORD.size)
+        data = f.read() if stop is None else f.read((stop - start) * _INDEX_RECORD.size)
+    # Drop a trailing partial record, e.g. from a crash in the middle of an index append
+    return list(_INDEX_RECORD.iter_unpack(data[:len(data) - len(data) % _INDEX_RECORD.size]))
+
+
+def _index_length(username, history_dir):
+    path = index_path(username, history_dir)
+    return os.path.getsize(path) // _INDEX_RECORD.size if os.path.exists(path) else 0
+
+
+def _position_of(username, history_dir, message_id, length):
+    """Binary search the index for the first record whose id is >= message_id."""
+    low, high = 0, length
+    with open(index_path(username, history_dir), "rb") as f:
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(middle * _INDEX_RECORD.size)
+            _, record_id, _ = _INDEX_RECORD.unpack(f.read(_INDEX_RECORD.size))
+            if record_id < message_id:
+                low = middle + 1
+            else:
+                high = middle
+    return low
+
+
+def append_messages(username, messages, history_dir=CHAT_HISTORY_DIR):
+    """Append messages to the user's log, assigning each one an "id" in place."""
+    with _user_lock(username, history_dir):
+        _append(username, messages, history_dir)
+
+
+def _append(username, messages, history_dir):
+    _ensure_index(username, history_dir)
+    length = _index_length(username, history_dir)
+    next_id = _read_index(username, history_dir, length - 1)[0][1] + 1 if length else 0
+    for message in messages:
+        message["id"] = next_id
+        next_id += 1
+
+    path = history_path(username, history_dir)
+    start_offset = os.path.getsize(path) if os.path.exists(path) else 0
+    lines, records = _index_records(messages, start_offset)
+    # Log first, then index: a crash in between leaves an index _ensure_index detects as stale
+    with open(path, "ab") as f:
+        f.write(lines)
+    with open(index_path(username, history_dir), "ab") as f:
+        f.write(records)
+
+
+def delete_message(username, message_id, history_dir=CHAT_HISTORY_DIR):
+    with _user_lock(username, history_dir):
+        with open(tombstone_path(username, history_dir), "a") as f:
+            f.write(f"{message_id}\n")
+
+
+def clear_history(username, history_dir=CHAT_HISTORY_DIR):
+    with _user_lock(username, history_dir):
+        for path in (
+            history_path(username, history_dir),
+            tombstone_path(username, history_dir),
+            index_path(username, history_dir),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def history_counts(username, history_dir=CHAT_HISTORY_DIR):
+    """Return (live messages, live user messages) from the index alone."""
+    with _user_lock(username, history_dir):
+        _ensure_index(username, history_dir)
+        deleted = _load_tombstones(username, history_dir)
+        records = _read_index(username, history_dir)
+    total = user_total = 0
+    for _, message_id, is_user in records:
+        if message_id not in deleted:
+            total += 1
+            user_total += is_user
+    return total, user_total
+
+
+def read_page(username, before_id=None, limit=50, history_dir=CHAT_HISTORY_DIR):
+    """Return up to limit live messages older than before_id (newest page if None), oldest first.
+
+    The second return value is True when older messages remain.
+    """
+    with _user_lock(username, history_dir):
+        return _read_page(username, before_id, limit, history_dir)
+
+
+def _read_page(username, before_id, limit, history_dir):
+    _ensure_index(username, history_dir)
+    length = _index_length(username, history_dir)
+    if not length:
+        return [], False
+    deleted = _load_tombstones(username, history_dir)
+    end = length if before_id is None else _position_of(username, history_dir, before_id, length)
+
+    offsets = []
+    position = end
+    while position > 0 and len(offsets) < limit:
+        start = max(0, position - (limit - len(offsets)))
+        for offset, message_id, _ in reversed(_read_index(username, history_dir, start, position)):
+            if message_id not in deleted:
+                offsets.append(offset)
+        position = start
+    offsets.reverse()
+
+    messages = []
+    with open(history_path(username, history_dir), "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            message = _parse(f.readline())
+            if message is not None:
+                messages.append(message)
+    return messages, position > 0
+
+
+def iter_history(username, batch_size=10000, history_dir=CHAT_HISTORY_DIR):
+    """Yield the user's live messages in lists of up to batch_size, oldest first, without loading the whole log."""
+    path = history_path(username, history_dir)
+    if not os.path.exists(path):
+        return
+    deleted = _load_tombstones(username, history_dir)
+    batch = []
+    with open(path, "rb") as f:
+        for line in f:
+            message = _parse(line) if line.strip() else None
+            if message is not None and message["id"] not in deleted:
+                batch.append(message)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def load_history(username, last_n=None, history_dir=CHAT_HISTORY_DIR):
+    """Return the user's live messages, oldest first; only the last last_n if given."""
+    if last_n is not None:
+        return read_page(username, limit=last_n, history_dir=history_dir)[0]
+
+    path = history_path(username, history_dir)
+    deleted = _load_tombstones(username, history_dir)
+    messages = _read_messages(path)
+    live = [m for m in messages if m["id"] not in deleted]
+    if len(deleted) >= COMPACT_MIN_TOMBSTONES and len(deleted) * 2 >= len(messages):
+        compact_history(username, history_dir)
+    return live
+
+
+def _rewrite(username, messages, history_dir):
+    # Called with the user's lock held
+    path = history_path(username, history_dir)
+    lines, records = _index_records(messages, 0)
+    for target, data in ((path, lines), (index_path(username, history_dir), records)):
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+    os.remove(tombstone_path(username, history_dir))
+
+
+def compact_history(username, history_dir=CHAT_HISTORY_DIR):
+    """Rewrite the log without deleted messages and drop the tombstones.
+
+    Message ids are kept, so ids held by open sessions stay valid.
+    """
+    with _user_lock(username, history_dir):
+        # Re-read under the lock: anything appended or deleted since the caller looked is kept
+        deleted = _load_tombstones(username, history_dir)
+        if not deleted:
+            return False
+        messages = _read_messages(history_path(username, history_dir))
+        _rewrite(username, [m for m in messages if m["id"] not in deleted], history_dir)
+        return True
+
+
+def convert_legacy_history(username, history_dir=CHAT_HISTORY_DIR):
+    """Convert <user>_history.json into the append-only log; the old file is renamed to .migrated."""
+    legacy_path = legacy_history_path(username, history_dir)
+    if not os.path.exists(legacy_path):
+        return False
+    with open(legacy_path, "r") as f:
+        messages = json.load(f)
+    with _user_lock(username, history_dir):
+        if not os.path.exists(legacy_path):
+            return False  # Converted by another session meanwhile
+        if os.path.exists(history_path(username, history_dir)):
+            # Already converted (or chatted since); keep the log and only retire the old file
+            messages = []
+        _append(username, messages, history_dir)
+        os.replace(legacy_path, legacy_path + ".migrated")
+    return True
+
+
+def convert_all_legacy_histories(history_dir=CHAT_HISTORY_DIR):
+    converted = []
+    for name in sorted(os.listdir(history_dir)):
+        if name.endswith("_history.json"):
+            username = name[:-len("_history.json")]
+            if convert_legacy_history(username, history_dir):
+                converted.append(username)
+    return converted
+
+
+if __name__ == "__main__":
+    # python -m src.chat_store [history_dir]
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else CHAT_HISTORY_DIR
+    for username in convert_all_legacy_histories(target_dir):
+        print(f"Converted chat history for {username}")
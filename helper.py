@@ -1,8 +1,13 @@
-import speech_recognition as sr
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 from gtts import gTTS
+from src.tts_cache import AudioCache
+from src.tts_backends import get_backend as get_tts_backend
+from src.response_cache import ResponseCache
+from src.chat_context import build_history, context_fingerprint
+from src.voice_capture import get_voice_capture
+from src.shared_cache import resource
 
 print("Perfect!!")
 load_dotenv()
@@ -10,40 +15,116 @@ load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
 
+# Synthesized speech shared by every session, keyed by (TTS backend, lang, text)
+speech_cache = AudioCache()
+
+# Gemini replies shared by every session, keyed by the normalized prompt
+response_cache = ResponseCache()
+
+# Gemini model used for chat replies, overridable per deployment
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro-latest")
+
+@resource()
+def _load_model(model_name):
+    genai.configure(api_key=GOOGLE_API_KEY)
+    # The SDK keeps one gRPC client per process, so every model object shares its channel
+    return genai.GenerativeModel(model_name)
+
+def get_model(model_name=None):
+    """Return the GenerativeModel for model_name, created once per process and shared by every session."""
+    return _load_model(model_name or GEMINI_MODEL)
+
 def voice_input():
-    r = sr.Recognizer()
-    
-    with sr.Microphone() as source:
-        print("Listening...")  # Debug message to see when the microphone is activated
-        audio = r.listen(source)
-        print("Audio captured.")  # Debug message after audio is captured
-    try:
-        # Recognize speech using Google Web Speech API
-        text = r.recognize_google(audio)
-        print(f"You said: {text}")  # Debug the recognized text
-        return text
-    except sr.UnknownValueError:
-        print("Sorry, could not understand the audio")  # Debug message for unrecognized speech
-        return None
-    except sr.RequestError as e:
-        print(f"Could not request results from Google Speech Recognition service: {e}")  # Debug for API errors
-        return None
-def text_to_speech(text):
+    # Shared, calibrated-once recognizer with a bounded capture; see voice_capture
+    return get_voice_capture().listen_and_transcribe()
+def text_to_speech(text, filename="speech.mp3"):
     tts = gTTS(text=text, lang="en")
-    tts.save("speech.mp3")
+    tts.save(filename)
+
+def text_to_speech_bytes(text, lang="en", use_cache=True, backend=None):
+    """Synthesize text with the configured TTS backend and return the audio bytes (see speech_format)."""
+    backend = get_tts_backend(backend)
+    if not use_cache:
+        return backend.synthesize(text, lang)
+    # Repeated replies (greetings, fallbacks) come straight from the cache
+    return speech_cache.get_or_create(text, lang, lambda: backend.synthesize(text, lang), voice=backend.name)
 
-def llm_model_object(user_text):
+def speech_format(backend=None):
+    """(MIME type, file extension) of the audio the TTS backend produces."""
+    backend = get_tts_backend(backend)
+    return backend.mime, backend.extension
+
+def llm_model_object(user_text, use_cache=True):
     """Generate response using the Gemini model."""
     
     # Check if user_text is None or empty
     if not user_text or not user_text.strip():  # Check if None or empty string
         return "Sorry, I didn't catch that. Please try again."  # Return a default message
     
-    genai.configure(api_key=GOOGLE_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-pro-latest')
+    if use_cache:
+        cached = response_cache.get(user_text)
+        if cached is not None:
+            return cached
+    
+    model = get_model()
     
     try:
         response = model.generate_content(user_text)
+        if use_cache:
+            response_cache.put(user_text, response.text)
         return response.text
     except Exception as e:
         return f"Error generating response: {str(e)}"  # Handle any errors from the API
+
+def summarize_turns(previous_summary, messages):
+    """Fold messages into previous_summary with one Gemini call; used for long chat context."""
+    transcript = "\n".join(
+        f"{'Child' if m['role'] == 'user' else 'KiddiChat'}: {m['content']}" for m in messages
+    )
+    prompt = (
+        "Update this summary of a conversation between a child and KiddiChat with the new messages. "
+        "Keep names, interests and open questions; answer with the summary only, under 150 words.\n\n"
+        f"Summary so far: {previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+    )
+    # API errors propagate: the caller must not mark these turns as summarized
+    return get_model().generate_content(prompt).text
+
+def stream_llm_response(user_text, history=None, username=None, use_cache=True):
+    """Yield the Gemini response in text chunks as they arrive.
+    
+    history is the earlier conversation (chat_history messages, oldest first); it is
+    packed into a token-budgeted chat session, summarizing older turns per username.
+    """
+    
+    if not user_text or not user_text.strip():
+        yield "Sorry, I didn't catch that. Please try again."
+        return
+    
+    # Replies depend on the context the model sees, so they are cached per context (summary + window)
+    chat_history = build_history(username, history, summarize_turns) if history else []
+    context = context_fingerprint(chat_history) if chat_history else ""
+    if use_cache:
+        cached = response_cache.get(user_text, context)
+        if cached is not None:
+            yield cached
+            return
+    
+    model = get_model()
+    
+    try:
+        # stream=True hands back partial candidates while the model is still generating
+        if chat_history:
+            chat = model.start_chat(history=chat_history)
+            response = chat.send_message(user_text, stream=True)
+        else:
+            response = model.generate_content(user_text, stream=True)
+        chunks = []
+        for chunk in response:
+            if chunk.parts:
+                chunks.append(chunk.text)
+                yield chunk.text
+        # Only complete, non-empty replies are cached; errors and abandoned streams never reach here
+        if use_cache and chunks:
+            response_cache.put(user_text, "".join(chunks), context)
+    except Exception as e:
+        yield f"Error generating response: {str(e)}"  # Handle any errors from the API
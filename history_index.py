@@ -0,0 +1,92 @@
+"""Search index over one user's chat history for the History page.
+
+Dates are parsed once per message, a date -> message ids map answers the
+date filter, and an inverted word index answers searches. The last word of
+a query is matched as a prefix (through a sorted vocabulary) so results
+update sensibly while the user is still typing. The index is updated in
+place as messages are added or deleted instead of being rebuilt.
+"""
+import re
+from bisect import bisect_left
+from datetime import date
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text):
+    return set(_WORD.findall(text.lower()))
+
+
+class HistoryIndex:
+    def __init__(self, messages=()):
+        self.messages = {}  # id -> message, in insertion (chronological) order
+        self._dates = {}  # id -> date
+        self._by_date = {}  # date -> set of ids
+        self._postings = {}  # word -> set of ids
+        self._vocabulary = None  # sorted words, rebuilt lazily after changes
+        for message in messages:
+            self.add(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, message):
+        message_id = message["id"]
+        self.messages[message_id] = message
+        message_date = date.fromisoformat(message["timestamp"][:10])
+        self._dates[message_id] = message_date
+        self._by_date.setdefault(message_date, set()).add(message_id)
+        for word in _words(message["content"]):
+            postings = self._postings.get(word)
+            if postings is None:
+                self._postings[word] = {message_id}
+                self._vocabulary = None
+            else:
+                postings.add(message_id)
+
+    def remove(self, message_id):
+        message = self.messages.pop(message_id, None)
+        if message is None:
+            return
+        message_date = self._dates.pop(message_id)
+        self._by_date[message_date].discard(message_id)
+        for word in _words(message["content"]):
+            postings = self._postings[word]
+            postings.discard(message_id)
+            if not postings:
+                del self._postings[word]
+                self._vocabulary = None
+
+    def _prefix_matches(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        matches = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            matches |= self._postings[self._vocabulary[position]]
+            position += 1
+        return matches
+
+    def search(self, on_date=None, query=""):
+        """Return ids of messages matching the date and query, oldest first."""
+        candidates = None
+        if on_date is not None:
+            candidates = set(self._by_date.get(on_date, ()))
+
+        words = _WORD.findall(query.lower())
+        if words:
+            # Complete words must match exactly; the one being typed matches as a prefix
+            for word in words[:-1]:
+                found = self._postings.get(word, set())
+                candidates = set(found) if candidates is None else candidates & found
+            found = self._prefix_matches(words[-1])
+            candidates = found if candidates is None else candidates & found
+        elif query.strip():
+            # Nothing word-like to index on (emoji, punctuation): fall back to a substring scan
+            needle = query.strip().lower()
+            pool = self.messages if candidates is None else candidates
+            candidates = {i for i in pool if needle in self.messages[i]["content"].lower()}
+
+        if candidates is None:
+            return list(self.messages)
+        return sorted(candidates)
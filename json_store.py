@@ -0,0 +1,162 @@
+"""Safe reads and writes of the JSON files under data/.
+
+Writes never touch the live file: data goes to a temp file in the same
+directory which is then renamed over the target, so readers see either the
+old or the new content and never a truncated file. Writers serialize on an
+advisory lock (fcntl.flock, or msvcrt.locking on Windows) held on a
+"<file>.lock" sidecar, which makes read-modify-write cycles safe across
+threads, sessions and processes.
+
+Each file also has a version token (inode, mtime, size) that changes on
+every write. Optimistic writers read (data, version), build new content
+without holding the lock, and pass expected_version to write_json; if
+someone else wrote in between, VersionConflict is raised and the caller
+re-reads and retries.
+
+JSON_WRITE_SAFETY sets how writes are made durable:
+
+    none    overwrite in place under the lock (fastest; a crash mid-write can truncate the file)
+    atomic  write a temp file and rename it over the old one (default)
+    fsync   as atomic, and fsync the file and its directory before returning
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+JSON_WRITE_SAFETY = os.getenv("JSON_WRITE_SAFETY", "atomic")
+SAFETY_MODES = ("none", "atomic", "fsync")
+MISSING = 0  # Version of a file that doesn't exist
+
+
+class VersionConflict(Exception):
+    """The file changed since it was read; re-read it and try again."""
+
+
+def file_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return MISSING
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+@contextmanager
+def locked(path):
+    """Hold the exclusive advisory lock for path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK itself only retries for ~10 seconds
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json_versioned(path, default=None):
+    """Return (data, version); (default, MISSING) if the file doesn't exist."""
+    while True:
+        version = file_version(path)
+        if version == MISSING:
+            return default, MISSING
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            continue  # Removed between stat and open
+        # A rename between stat and open would make the version stale; check it still matches
+        if file_version(path) == version:
+            return data, version
+
+
+def read_json(path, default=None):
+    return read_json_versioned(path, default)[0]
+
+
+def _check_safety(safety):
+    safety = safety or JSON_WRITE_SAFETY
+    if safety not in SAFETY_MODES:
+        raise ValueError(f"Unknown safety mode {safety!r}; choose from {', '.join(SAFETY_MODES)}")
+    return safety
+
+
+def _write(path, data, safety):
+    # json.dumps uses the C encoder; json.dump streams through the much slower pure-Python one
+    if safety == "none":
+        with open(path, "w") as f:
+            f.write(json.dumps(data))
+        return
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(data))
+            if safety == "fsync":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if safety == "fsync" and hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (not possible on Windows)
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_json(path, data, expected_version=None, safety=None):
+    """Write data to path under its lock; returns the new version.
+
+    With expected_version, raises VersionConflict instead of writing if the
+    file is no longer at that version (MISSING: the file must not exist yet).
+    """
+    safety = _check_safety(safety)
+    with locked(path):
+        if expected_version is not None and file_version(path) != expected_version:
+            raise VersionConflict(path)
+        _write(path, data, safety)
+        return file_version(path)
+
+
+def update_json(path, update, default=None, safety=None):
+    """Apply update(data) -> new data to the file while holding its lock; returns the new data."""
+    safety = _check_safety(safety)
+    with locked(path):
+        data = update(read_json(path, default))
+        _write(path, data, safety)
+        return data
+
+
+def update_json_optimistic(path, update, default=None, safety=None):
+    """Like update_json, but update(data) runs without the lock and is retried if the file changed meanwhile."""
+    while True:
+        data, version = read_json_versioned(path, default)
+        data = update(data)
+        try:
+            write_json(path, data, expected_version=version, safety=safety)
+            return data
+        except VersionConflict:
+            continue
@@ -0,0 +1,143 @@
+"""Per-user mood series kept sorted in NumPy columns for the Stats page.
+
+The series is parsed once per user and process, then appended to as new
+mood points arrive, so the chart never re-parses or re-sorts the whole log.
+Long series are downsampled for display with daily/weekly means or LTTB
+(largest-triangle-three-buckets), which keeps the shape of the curve with
+a bounded number of points. Series for the least recently used users are
+dropped past MOOD_SERIES_MAX_USERS and rebuilt from the mood log when
+they're needed again.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DISPLAY_MAX_POINTS = 1000
+MOOD_SERIES_MAX_USERS = int(os.getenv("MOOD_SERIES_MAX_USERS", "256"))
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+# datetime64 epoch day 0 is a Thursday; shifting by 3 days makes weekly buckets start on Monday
+_WEEK_OFFSET = 3 * _SECONDS_PER_DAY
+
+_series = OrderedDict()  # username -> MoodSeries, least recently used first
+_series_lock = threading.Lock()
+
+
+class MoodSeries:
+    def __init__(self, timestamps, scores):
+        order = np.argsort(timestamps, kind="stable")
+        self._timestamps = np.asarray(timestamps, dtype="datetime64[s]")[order]
+        self._scores = np.asarray(scores, dtype=np.int8)[order]
+        self._size = len(self._timestamps)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, mood_data):
+        return cls(
+            np.array([entry["timestamp"] for entry in mood_data], dtype="datetime64[s]"),
+            np.array([entry["score"] for entry in mood_data], dtype=np.int8),
+        )
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self._size]
+
+    @property
+    def scores(self):
+        return self._scores[:self._size]
+
+    def snapshot(self):
+        """Copies of (timestamps, scores) taken together, safe against appends from other sessions."""
+        with self._lock:
+            return self.timestamps.copy(), self.scores.copy()
+
+    def append(self, timestamp, score):
+        timestamp = np.datetime64(timestamp, "s")
+        with self._lock:
+            if self._size == len(self._timestamps):
+                # Grow geometrically so appends are amortized O(1)
+                capacity = max(16, self._size * 2)
+                self._timestamps = np.resize(self._timestamps, capacity)
+                self._scores = np.resize(self._scores, capacity)
+            position = self._size
+            if self._size and timestamp < self._timestamps[self._size - 1]:
+                position = int(np.searchsorted(self.timestamps, timestamp, side="right"))
+                self._timestamps[position + 1:self._size + 1] = self._timestamps[position:self._size]
+                self._scores[position + 1:self._size + 1] = self._scores[position:self._size]
+            self._timestamps[position] = timestamp
+            self._scores[position] = score
+            self._size += 1
+
+    def aggregate(self, period):
+        """Mean score per "day" or "week"; returns (bucket start times, means)."""
+        return _aggregate(*self.snapshot(), period)
+
+    def for_display(self, resolution="auto", max_points=DISPLAY_MAX_POINTS):
+        """Return (timestamps, scores) to plot at the given resolution: "auto", "day" or "week"."""
+        timestamps, scores = self.snapshot()
+        if resolution in ("day", "week"):
+            return _aggregate(timestamps, scores, resolution)
+        if len(timestamps) <= max_points:
+            return timestamps, scores
+        keep = lttb_indices(timestamps.astype(np.int64), scores.astype(np.float64), max_points)
+        return timestamps[keep], scores[keep]
+
+
+def _aggregate(timestamps, scores, period):
+    seconds = timestamps.astype(np.int64)
+    if period == "day":
+        buckets = seconds // _SECONDS_PER_DAY * _SECONDS_PER_DAY
+    else:
+        week = 7 * _SECONDS_PER_DAY
+        buckets = (seconds + _WEEK_OFFSET) // week * week - _WEEK_OFFSET
+    starts, first_index, counts = np.unique(buckets, return_index=True, return_counts=True)
+    sums = np.add.reduceat(scores.astype(np.int64), first_index) if len(first_index) else np.array([])
+    return starts.astype("datetime64[s]"), sums / np.maximum(counts, 1)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by largest-triangle-three-buckets downsampling."""
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+    x = x.astype(np.float64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else size
+        # Average of the next bucket stands in for the third triangle vertex
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def get_mood_series(username, mood_data=None):
+    """Return the process-wide series for username, building it from mood_data on first use."""
+    with _series_lock:
+        series = _series.get(username)
+        if series is None and mood_data is not None:
+            series = _series[username] = MoodSeries.from_records(mood_data)
+            while len(_series) > MOOD_SERIES_MAX_USERS:
+                _series.popitem(last=False)
+        if series is not None:
+            _series.move_to_end(username)
+        return series
+
+
+def drop_mood_series(username):
+    with _series_lock:
+        _series.pop(username, None)
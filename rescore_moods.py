@@ -0,0 +1,92 @@
+"""Offline job that recomputes every user's mood log from their chat history.
+
+Run it after changing the sentiment lexicon so stored scores match the
+current scorer:
+
+    python -m src.rescore_moods [--workers N] [--data-dir data]
+
+Users are processed in parallel on a process pool. Each user's history is
+streamed in batches and scored with the vectorized scorer, and the new mood
+log is written through json_store.update_json, under the same lock and
+safety mode the app's writes use. Each entry carries its message's id.
+Entries belonging to deleted messages are dropped; entries the app added
+for messages after the last scored one are kept. Rescored users' stored
+login bundles are dropped, since their mood summaries no longer match;
+the next login rebuilds them.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from src import chat_store
+from src.json_store import update_json
+from src.sentiment import get_lexicon, label_series, score_series
+from src.user_store import UserStore
+
+BATCH_SIZE = 50000
+
+
+def rescore_user(username, history_dir, mood_dir):
+    """Rewrite one user's mood log; returns (username, messages scored)."""
+    entries = []
+    for batch in chat_store.iter_history(username, BATCH_SIZE, history_dir):
+        frame = pd.DataFrame(batch, columns=["id", "role", "content", "timestamp"])
+        frame = frame[frame["role"] == "user"].reset_index(drop=True)
+        if frame.empty:
+            continue
+        labels, moods = label_series(score_series(frame["content"], get_lexicon()))
+        entries.extend(
+            {"id": int(message_id), "timestamp": timestamp, "sentiment": label, "score": int(mood)}
+            for message_id, timestamp, label, mood in zip(frame["id"], frame["timestamp"], labels, moods)
+        )
+    
+    last_scored = entries[-1]["id"] if entries else -1
+    # Keep records for messages sent while this user was being rescored. A record is written
+    # after its message, so its timestamp can't tell the two apart; the id can. Records from
+    # before ids were stored all belong to scored (or deleted) messages and are replaced.
+    update_json(
+        os.path.join(mood_dir, f"{username}_mood.json"),
+        lambda current: entries + [entry for entry in current if entry.get("id") is not None and entry["id"] > last_scored],
+        default=[],
+    )
+    return username, len(entries)
+
+
+def list_users(history_dir):
+    suffix = "_history.jsonl"
+    return sorted(name[:-len(suffix)] for name in os.listdir(history_dir) if name.endswith(suffix))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    
+    history_dir = os.path.join(args.data_dir, "chat_history")
+    mood_dir = os.path.join(args.data_dir, "mood_data")
+    chat_store.convert_all_legacy_histories(history_dir)
+    usernames = list_users(history_dir)
+    
+    users_db = os.path.join(args.data_dir, "users.db")
+    store = UserStore(users_db) if os.path.exists(users_db) else None
+    
+    start = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(rescore_user, username, history_dir, mood_dir) for username in usernames]
+        for future in as_completed(futures):
+            username, scored = future.result()
+            total += scored
+            if store is not None:
+                store.put_bundle(username, None)
+            print(f"Rescored {scored} messages for {username}")
+    elapsed = time.perf_counter() - start
+    print(f"Rescored {total} messages for {len(usernames)} users in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
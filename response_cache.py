@@ -0,0 +1,124 @@
+"""In-process cache of Gemini replies keyed by the normalized prompt.
+
+Lookups try an exact match on the normalized prompt first. When
+RESPONSE_CACHE_SIMILARITY is set (0-1), a miss falls back to the cached
+prompt with the highest word-set (Jaccard) similarity above that threshold,
+found through an inverted word index. Entries expire after a TTL and the
+least recently used ones are evicted past the size bound.
+
+Replies that depend on earlier turns are stored under a context
+fingerprint (see chat_context.context_fingerprint) and only match lookups
+made with the same context; context-free prompts use the empty context.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation and collapse whitespace: "Tell me a joke!" -> "tell me a joke"."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+class ResponseCache:
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES, similarity=RESPONSE_CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (context, normalized prompt) -> (response, expires_at), least recently used first
+        self._word_index = {}  # word -> (context, normalized prompt) keys containing it
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _remove(self, key):
+        del self._entries[key]
+        for word in set(key[1].split()):
+            prompts = self._word_index.get(word)
+            if prompts is not None:
+                prompts.discard(key)
+                if not prompts:
+                    del self._word_index[word]
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _most_similar(self, key):
+        context, prompt = key
+        words = set(prompt.split())
+        if not words:
+            return None
+        candidates = set()
+        for word in words:
+            candidates.update(candidate for candidate in self._word_index.get(word, ()) if candidate[0] == context)
+        best_key, best_score = None, self.similarity
+        for candidate in candidates:
+            candidate_words = set(candidate[1].split())
+            score = len(words & candidate_words) / len(words | candidate_words)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+    def get(self, prompt, context=""):
+        key = (context, normalize_prompt(prompt))
+        now = time.time()
+        with self._lock:
+            response = self._live(key, now)
+            if response:
+                self.exact_hits += 1
+                return response
+            if self.similarity > 0:
+                similar_key = self._most_similar(key)
+                response = self._live(similar_key, now) if similar_key else None
+                if response:
+                    self.similar_hits += 1
+                    return response
+            self.misses += 1
+            return None
+
+    def put(self, prompt, response, context=""):
+        key = (context, normalize_prompt(prompt))
+        # An empty reply (blocked or no candidates) would be served as an empty bubble until it expires
+        if not key[1] or not response or not response.strip():
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (response, time.time() + self.ttl)
+            for word in set(key[1].split()):
+                self._word_index.setdefault(word, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._word_index.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
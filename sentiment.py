@@ -0,0 +1,121 @@
+"""Token-based sentiment scoring.
+
+Text is lowercased and tokenized once and every token is looked up in the
+lexicon's hash tables, so scoring costs O(message length) whatever the
+lexicon size, and "glad" no longer matches inside "gladiator". A negator
+("not", "don't", ...) up to NEGATION_WINDOW tokens before a sentiment word
+flips its polarity.
+
+SENTIMENT_LEXICON_PATH points at a JSON word list (see load_lexicon) that
+replaces DEFAULT_LEXICON; get_lexicon() parses it once per process.
+"""
+import json
+import os
+import re
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from src.shared_cache import resource
+
+NEGATION_WINDOW = 3
+SENTIMENT_LEXICON_PATH = os.getenv("SENTIMENT_LEXICON_PATH", "")
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class Lexicon:
+    def __init__(self, positive, negative, negators=()):
+        self.positive = frozenset(positive)
+        self.negative = frozenset(negative)
+        self.negators = frozenset(negators)
+        self.polarity = {word: (word in self.positive) - (word in self.negative) for word in self.positive | self.negative}
+
+
+DEFAULT_LEXICON = Lexicon(
+    positive=["happy", "good", "great", "awesome", "excellent", "love", "like", "thanks", "thank", "please", "help", "nice", "wonderful", "fantastic", "amazing", "joy", "glad", "positive"],
+    negative=["sad", "bad", "terrible", "awful", "hate", "dislike", "angry", "mad", "upset", "unhappy", "disappointed", "negative", "worse", "worst", "horrible"],
+    negators=["not", "no", "never", "don't", "dont", "doesn't", "didn't", "isn't", "wasn't", "aren't", "can't", "won't", "nobody", "nothing"],
+)
+
+
+def load_lexicon(path):
+    """Load a lexicon from a JSON file with "positive", "negative" and optional "negators" word lists."""
+    with open(path, "r") as f:
+        words = json.load(f)
+    return Lexicon(words["positive"], words["negative"], words.get("negators", ()))
+
+
+@resource()
+def get_lexicon(path=SENTIMENT_LEXICON_PATH):
+    """The configured lexicon, shared by every session; DEFAULT_LEXICON when no path is set."""
+    return load_lexicon(path) if path else DEFAULT_LEXICON
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower().replace("’", "'"))
+
+
+def score_tokens(tokens, lexicon=DEFAULT_LEXICON):
+    """Return positive minus negative word count, with negated words counted the other way."""
+    if lexicon.negators.isdisjoint(tokens):
+        # Common case: no negation, so the score is just the sum of word polarities
+        return sum(map(lexicon.polarity.get, tokens, repeat(0, len(tokens))))
+    score = 0
+    last_negator = -NEGATION_WINDOW - 1
+    for position, token in enumerate(tokens):
+        if token in lexicon.negators:
+            last_negator = position
+            continue
+        polarity = lexicon.polarity.get(token, 0)
+        # "not very happy" is negative: the negator reaches NEGATION_WINDOW tokens ahead
+        score += -polarity if position - last_negator <= NEGATION_WINDOW else polarity
+    return score
+
+
+def label_score(score):
+    """Map a raw score to the (sentiment, 1-5 mood score) pair stored in the mood log."""
+    if score > 2:
+        return "very_positive", 5
+    elif score > 0:
+        return "positive", 4
+    elif score == 0:
+        return "neutral", 3
+    elif score > -3:
+        return "negative", 2
+    else:
+        return "very_negative", 1
+
+
+def analyze_sentiment(text, lexicon=DEFAULT_LEXICON):
+    return label_score(score_tokens(tokenize(text), lexicon))
+
+
+def analyze_sentiment_batch(texts, lexicon=DEFAULT_LEXICON):
+    return [label_score(score_tokens(tokenize(text), lexicon)) for text in texts]
+
+
+def score_series(texts, lexicon=DEFAULT_LEXICON):
+    """Vectorized score_tokens over a Series of texts (unique index); returns an int Series on the same index."""
+    texts = pd.Series(texts)
+    tokens = texts.str.lower().str.replace("’", "'", regex=False).str.findall(_TOKEN).explode().dropna()
+    if tokens.empty:
+        return pd.Series(0, index=texts.index, dtype="int64")
+    position = tokens.groupby(level=0).cumcount()
+    polarity = tokens.map(lexicon.polarity).fillna(0).astype("int64")
+    is_negator = tokens.isin(lexicon.negators)
+    # Position of the closest negator at or before each token, within the same message
+    last_negator = position.where(is_negator).groupby(level=0).ffill()
+    negated = ~is_negator & (position - last_negator <= NEGATION_WINDOW)
+    polarity = polarity.where(~negated, -polarity)
+    return polarity.groupby(level=0).sum().reindex(texts.index, fill_value=0)
+
+
+def label_series(scores):
+    """Vectorized label_score: returns (sentiment labels, mood scores) as arrays."""
+    scores = np.asarray(scores)
+    conditions = [scores > 2, scores > 0, scores == 0, scores > -3]
+    labels = np.select(conditions, ["very_positive", "positive", "neutral", "negative"], "very_negative")
+    moods = np.select(conditions, [5, 4, 3, 2], 1)
+    return labels, moods
@@ -0,0 +1,81 @@
+"""Streamlit caches shared by every session, with hit counts for the admin page.
+
+resource() wraps st.cache_resource: the value is built once per process and
+the same object is handed to every session and worker thread (models, TTS
+engines, the lexicon, theme CSS). data() wraps st.cache_data: every caller
+gets its own copy, for per-user data derived from files. Per-user entries
+take the user's profile version (ProfileCache.version) as an argument, so
+a write makes the old entry unreachable and it ages out through
+max_entries/ttl instead of being served stale.
+
+Streamlit doesn't report how often a cache is hit, so each wrapped function
+counts its lookups and the misses that ran the function body; see
+cache_stats().
+"""
+import functools
+import os
+import threading
+from collections import Counter
+
+import streamlit as st
+
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", str(60 * 60)))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "512"))
+
+_lookups = Counter()
+_misses = Counter()
+_kinds = {}
+_stats_lock = threading.Lock()
+
+
+def _count(counter, name):
+    with _stats_lock:
+        counter[name] += 1
+
+
+def _counted(kind, cache_decorator, options):
+    def decorate(fn):
+        name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+        _kinds[name] = kind
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            _count(_misses, name)
+            return fn(*args, **kwargs)
+
+        cached = cache_decorator(show_spinner=False, **options)(compute)
+
+        @functools.wraps(fn)
+        def lookup(*args, **kwargs):
+            _count(_lookups, name)
+            return cached(*args, **kwargs)
+
+        lookup.clear = cached.clear
+        return lookup
+    return decorate
+
+
+def resource(**options):
+    """st.cache_resource with lookup/miss counting; options go to st.cache_resource."""
+    return _counted("resource", st.cache_resource, options)
+
+
+def data(**options):
+    """st.cache_data with lookup/miss counting; per-user caches default to USER_CACHE_* limits."""
+    options.setdefault("ttl", USER_CACHE_TTL_SECONDS)
+    options.setdefault("max_entries", USER_CACHE_MAX_ENTRIES)
+    return _counted("data", st.cache_data, options)
+
+
+def cache_stats():
+    """{function: {"kind", "lookups", "misses", "hit_rate"}} for every wrapped function."""
+    with _stats_lock:
+        return {
+            name: {
+                "kind": kind,
+                "lookups": _lookups[name],
+                "misses": _misses[name],
+                "hit_rate": 1 - _misses[name] / _lookups[name] if _lookups[name] else 0.0,
+            }
+            for name, kind in _kinds.items()
+        }
@@ -0,0 +1,118 @@
+"""Background text-to-speech jobs so a chat turn never waits on synthesis.
+
+A reply is split into sentences and every sentence is synthesized as its
+own task on a small process-wide worker pool, so several sentences render
+at once and the first one is playable long before the whole reply is.
+Segments are handed out in reply order. The number of queued or running
+jobs is bounded; when the pool is saturated new jobs are refused and the
+reply is simply shown without audio.
+
+The time from submitting a job to its first playable segment is recorded
+as the first-audio latency; see first_audio_stats().
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.helper import speech_format, text_to_speech_bytes
+from src.tts_backends import split_sentences
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+TTS_MAX_PENDING = int(os.getenv("TTS_MAX_PENDING", "16"))
+FIRST_AUDIO_SAMPLES = 200  # Recent jobs kept for the first-audio latency metric
+
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+_pending_slots = threading.BoundedSemaphore(TTS_MAX_PENDING)
+_first_audio_latencies = deque(maxlen=FIRST_AUDIO_SAMPLES)
+_metrics_lock = threading.Lock()
+
+
+class SpeechJob:
+    """Handle for one reply's audio, as ordered per-sentence segments of type mime."""
+
+    def __init__(self, text):
+        self.text = text
+        self.sentences = split_sentences(text)
+        self.mime = speech_format()[0]
+        self.cancelled = False
+        self.futures = []
+        self.submitted_at = time.perf_counter()
+        self.first_audio_seconds = None
+
+    def cancel(self):
+        # Segments already running finish their synthesis, but their audio is thrown away
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def segments(self):
+        """Audio of the leading sentences that are ready, in order; failed sentences are skipped."""
+        if self.cancelled:
+            return []
+        ready = []
+        for future in self.futures:
+            if not future.done():
+                break
+            if not future.cancelled() and future.result() is not None:
+                ready.append(future.result())
+        return ready
+
+    def _synthesize(self, sentence):
+        if self.cancelled:
+            return None
+        try:
+            return text_to_speech_bytes(sentence)
+        except Exception as e:
+            print(f"Speech synthesis failed: {e}")
+            return None
+
+    def _first_segment_done(self, future):
+        self.first_audio_seconds = time.perf_counter() - self.submitted_at
+        # Cancelled or failed jobs never produced audio, so they'd only skew the metric
+        if not self.cancelled and not future.cancelled() and future.result() is not None:
+            with _metrics_lock:
+                _first_audio_latencies.append(self.first_audio_seconds)
+
+
+def submit_speech(text):
+    """Queue speech synthesis for text; returns a SpeechJob, or None if the queue is full or there's nothing to say."""
+    job = SpeechJob(text)
+    if not job.sentences:
+        return None
+    if not _pending_slots.acquire(blocking=False):
+        print("Speech queue is full, skipping audio for this reply")
+        return None
+    # Submitted in reply order, so the pool works on the first sentence first
+    job.futures = [_executor.submit(job._synthesize, sentence) for sentence in job.sentences]
+    job.futures[0].add_done_callback(job._first_segment_done)
+    remaining = [len(job.futures)]
+    remaining_lock = threading.Lock()
+
+    def release_slot(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                _pending_slots.release()
+
+    for future in job.futures:
+        future.add_done_callback(release_slot)
+    return job
+
+
+def first_audio_stats():
+    """Count, mean, median and 95th percentile (seconds) of recent first-audio latencies."""
+    with _metrics_lock:
+        samples = sorted(_first_audio_latencies)
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p95": None}
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
@@ -0,0 +1,152 @@
+"""Pluggable speech-to-text backends for voice input.
+
+STT_BACKEND picks the engine:
+
+    google   Google Web Speech API through SpeechRecognition (default, needs network)
+    vosk     Vosk/Kaldi on CPU, fully offline; model folder at VOSK_MODEL_PATH
+    whisper  OpenAI Whisper on CPU, fully offline; model size from WHISPER_MODEL
+
+Every backend can transcribe a finished sr.AudioData. Capture also opens a
+stream with start_stream() and feeds it chunks while the user is speaking:
+Vosk decodes each chunk as it arrives, so only the tail is left to decode
+when the phrase ends; backends that can't stream just buffer the chunks.
+Local models are loaded once per process.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from src.shared_cache import resource
+
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "data/models/vosk")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+MODEL_SAMPLE_RATE = 16000  # Both Vosk and Whisper models expect 16 kHz, 16-bit mono
+
+class BufferedStream:
+    """Collects chunks and transcribes them in one go when the phrase ends."""
+
+    def __init__(self, backend, sample_rate, sample_width):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+
+    def finish(self):
+        if not self.chunks:
+            return None
+        return self.backend.transcribe(sr.AudioData(b"".join(self.chunks), self.sample_rate, self.sample_width))
+
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        try:
+            # Recognize speech using Google Web Speech API
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            print("Sorry, could not understand the audio")  # Debug message for unrecognized speech
+            return None
+        except sr.RequestError as e:
+            print(f"Could not request results from Google Speech Recognition service: {e}")  # Debug for API errors
+            return None
+
+    def start_stream(self, sample_rate, sample_width):
+        return BufferedStream(self, sample_rate, sample_width)
+
+
+class VoskStream:
+    def __init__(self, backend, sample_rate, sample_width):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(backend.model, MODEL_SAMPLE_RATE)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.fed = False
+
+    def feed(self, chunk):
+        # Reuse SpeechRecognition's resampling so any source rate/width works
+        pcm = sr.AudioData(chunk, self.sample_rate, self.sample_width).get_raw_data(
+            convert_rate=MODEL_SAMPLE_RATE, convert_width=2
+        )
+        self.recognizer.AcceptWaveform(pcm)
+        self.fed = True
+
+    def finish(self):
+        if not self.fed:
+            return None
+        # Partial results are per utterance, so take the full final transcript
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        return text or None
+
+
+class VoskBackend:
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        from vosk import Model, SetLogLevel
+        if not os.path.isdir(model_path):
+            raise RuntimeError(
+                f"Vosk model not found at {model_path}; download one from "
+                "https://alphacephei.com/vosk/models and set VOSK_MODEL_PATH"
+            )
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def transcribe(self, audio):
+        stream = self.start_stream(audio.sample_rate, audio.sample_width)
+        stream.feed(audio.get_raw_data())
+        return stream.finish()
+
+    def start_stream(self, sample_rate, sample_width):
+        return VoskStream(self, sample_rate, sample_width)
+
+
+class WhisperBackend:
+    name = "whisper"
+
+    def __init__(self, model_name=WHISPER_MODEL):
+        import whisper
+        # recognize_whisper would reload the model on every call, so hold on to it here
+        self.model = whisper.load_model(model_name, device="cpu")
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio):
+        pcm = audio.get_raw_data(convert_rate=MODEL_SAMPLE_RATE, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        with self._lock:
+            result = self.model.transcribe(samples, language="en", fp16=False)
+        return result["text"].strip() or None
+
+    def start_stream(self, sample_rate, sample_width):
+        return BufferedStream(self, sample_rate, sample_width)
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+
+
+@resource()
+def _load_backend(name):
+    # Built once per process; concurrent first calls wait for the same instance
+    return BACKENDS[name]()
+
+
+def get_backend(name=None):
+    """Return the process-wide backend called name (default: STT_BACKEND), shared by every session."""
+    name = (name or STT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return _load_backend(name)
@@ -0,0 +1,142 @@
+"""The declarative rules must unlock exactly what the original if-chain in app.py unlocked.
+
+Randomized sessions are replayed through both evaluators turn by turn; the
+rule engine keeps its last_seen counters across turns (incremental checks)
+while the legacy chain re-evaluates everything each time.
+"""
+import random
+
+import pytest
+
+from src.achievements import ACHIEVEMENT_RULES, check_achievements
+
+RULES = {rule.title: rule for rule in ACHIEVEMENT_RULES}
+
+MESSAGE_PIECES = [
+    "hi", "Thank you so much", "THANKS!", "I appreciate it", "tell me a Story", "I want to DRAW",
+    "what is that?", "😊", "👍 cool", "❤️", "I imagine a castle", "party 🎉", "ok", "art class",
+    "why do cats purr", "x" * 120, "",
+]
+
+
+class Session:
+    def __init__(self):
+        self.points = 0
+        self.streak = 0
+        self.history = 0
+        self.achievements = []
+        self.earned_titles = set()
+        self.unlocked = []
+
+    def add_achievement(self, title, description, points, icon):
+        # What app.add_achievement does to the counters
+        if title not in self.earned_titles:
+            self.achievements.append({"title": title, "description": description, "points": points, "icon": icon})
+            self.earned_titles.add(title)
+            self.points += points
+            self.unlocked.append(title)
+
+
+def legacy_check(session, message=None):
+    """The original check_for_achievements, with session state replaced by a Session."""
+    def unlock(title):
+        rule = RULES[title]
+        session.add_achievement(rule.title, rule.description, rule.points, rule.icon)
+
+    def earned(title):
+        return any(a["title"] == title for a in session.achievements)
+
+    if session.points >= 100 and not earned("Beginner Communicator"):
+        unlock("Beginner Communicator")
+    if session.points >= 500 and not earned("Intermediate Communicator"):
+        unlock("Intermediate Communicator")
+    if session.points >= 1000 and not earned("Advanced Communicator"):
+        unlock("Advanced Communicator")
+    if session.streak >= 3 and not earned("3-Day Streak"):
+        unlock("3-Day Streak")
+    if session.streak >= 7 and not earned("Weekly Streak"):
+        unlock("Weekly Streak")
+    if session.streak >= 30 and not earned("Monthly Dedication"):
+        unlock("Monthly Dedication")
+    if session.history >= 10 and not earned("Conversation Starter"):
+        unlock("Conversation Starter")
+    if session.history >= 50 and not earned("Regular Chatter"):
+        unlock("Regular Chatter")
+    if session.history >= 100 and not earned("Chatting Expert"):
+        unlock("Chatting Expert")
+    if message:
+        if any(word in message.lower() for word in ["thank you", "thanks", "appreciate"]) and not earned("Gratitude Expert"):
+            unlock("Gratitude Expert")
+        if len(message) > 100 and not earned("Deep Thinker"):
+            unlock("Deep Thinker")
+        creative_words = ["imagine", "create", "story", "idea", "draw", "invent", "design", "art"]
+        if any(word in message.lower() for word in creative_words) and not earned("Creative Mind"):
+            unlock("Creative Mind")
+        if "?" in message and not earned("Curious Learner"):
+            unlock("Curious Learner")
+        emoji_list = ["😊", "😄", "🙂", "👍", "❤️", "😁", "🎉", "👋", "😃"]
+        if any(emoji in message for emoji in emoji_list) and not earned("Emoji Expert"):
+            unlock("Emoji Expert")
+
+
+def rule_check(session, last_seen, message=None):
+    check_achievements(
+        lambda counter: getattr(session, counter),
+        session.earned_titles,
+        last_seen,
+        lambda rule: session.add_achievement(rule.title, rule.description, rule.points, rule.icon),
+        message,
+    )
+
+
+def random_message(rng):
+    if rng.random() < 0.1:
+        return None  # A check without a message, e.g. right after login
+    return " ".join(rng.choice(MESSAGE_PIECES) for _ in range(rng.randint(1, 3)))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_same_unlocks_as_legacy_chain(seed):
+    rng = random.Random(seed)
+    legacy, engine = Session(), Session()
+    last_seen = {}
+    for turn in range(rng.randint(1, 120)):
+        message = random_message(rng)
+        points = rng.choice([0, 5, 10, 15, 40, 150, 400])
+        streak = rng.choice([None, None, None, 1, "+1", "+1", "+5", "+20"])
+        for session in (legacy, engine):
+            session.points += points
+            session.history += 2  # The message and the reply
+            if streak == 1:
+                session.streak = 1
+            elif streak:
+                session.streak += int(streak)
+        legacy_check(legacy, message)
+        rule_check(engine, last_seen, message)
+        assert engine.unlocked == legacy.unlocked, f"turn {turn}: {message!r}"
+        assert (engine.points, engine.earned_titles) == (legacy.points, legacy.earned_titles)
+
+
+def test_unlock_cascades_within_one_check():
+    # 480 points + Beginner's 20 reaches 500, so Intermediate unlocks in the same check
+    legacy, engine = Session(), Session()
+    legacy.points = engine.points = 480
+    legacy_check(legacy)
+    rule_check(engine, {})
+    assert engine.unlocked == legacy.unlocked == ["Beginner Communicator", "Intermediate Communicator"]
+
+
+def test_unchanged_counters_are_not_rechecked():
+    engine = Session()
+    engine.points = 150
+    last_seen = {}
+    rule_check(engine, last_seen)
+    checked = []
+    check_achievements(
+        lambda counter: checked.append(counter) or getattr(engine, counter),
+        engine.earned_titles,
+        last_seen,
+        lambda rule: pytest.fail(f"unexpected unlock {rule.title}"),
+    )
+    # Only the comparisons against last_seen, no rule evaluation
+    assert checked == ["points", "streak", "history"]
@@ -0,0 +1,64 @@
+"""Concurrent writers for one user must never share ids or corrupt the log and index.
+
+Run from the directory that contains src/:  python -m pytest src/tests
+"""
+import multiprocessing
+import threading
+
+from src import chat_store
+
+APPENDS = 150
+
+
+def append_many(history_dir, writer, count=APPENDS):
+    for i in range(count):
+        chat_store.append_messages("kid", [{"role": "user", "content": f"{writer}-{i}"}], history_dir)
+
+
+def check_history(history_dir, expected):
+    messages = chat_store.load_history("kid", history_dir=history_dir)
+    ids = [message["id"] for message in messages]
+    assert len(messages) == expected
+    assert len(set(ids)) == expected
+    assert ids == sorted(ids)
+    assert chat_store.history_counts("kid", history_dir) == (expected, expected)
+    page, has_older = chat_store.read_page("kid", limit=50, history_dir=history_dir)
+    assert page == messages[-50:]
+    assert has_older == (expected > 50)
+
+
+def test_threads_get_unique_ids(tmp_path):
+    threads = [threading.Thread(target=append_many, args=(str(tmp_path), w)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check_history(str(tmp_path), 4 * APPENDS)
+
+
+def test_processes_get_unique_ids(tmp_path):
+    processes = [multiprocessing.Process(target=append_many, args=(str(tmp_path), w)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    check_history(str(tmp_path), 4 * APPENDS)
+
+
+def test_compaction_keeps_concurrent_appends(tmp_path):
+    history_dir = str(tmp_path)
+    append_many(history_dir, "old", 200)
+    old_ids = list(range(200))
+
+    writer = threading.Thread(target=append_many, args=(history_dir, "new", APPENDS * 4))
+    writer.start()
+    while writer.is_alive() or old_ids:
+        # Delete old messages one by one and compact after each, racing the writer
+        if old_ids:
+            chat_store.delete_message("kid", old_ids.pop(), history_dir)
+        chat_store.compact_history("kid", history_dir)
+    writer.join()
+
+    check_history(history_dir, APPENDS * 4)
+    assert not (tmp_path / "kid_history.deleted").exists()
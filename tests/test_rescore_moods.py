@@ -0,0 +1,47 @@
+"""Rescoring must replace the app's mood records, not add to them.
+
+Run from the directory that contains src/:  python -m pytest src/tests
+"""
+from src import chat_store
+from src.json_store import read_json, write_json
+from src.rescore_moods import rescore_user
+
+
+def mood_path(tmp_path):
+    return str(tmp_path / "mood" / "kid_mood.json")
+
+
+def send(history_dir, content, timestamp):
+    message = {"role": "user", "content": content, "timestamp": timestamp}
+    chat_store.append_messages("kid", [message, {"role": "assistant", "content": "ok", "timestamp": timestamp}], history_dir)
+    return message["id"]
+
+
+def test_records_of_scored_messages_are_replaced(tmp_path):
+    history_dir = str(tmp_path / "history")
+    first = send(history_dir, "I am happy", "2026-01-01 10:00:00")
+    second = send(history_dir, "I am sad", "2026-01-01 10:05:00")
+    # The app writes each record a few seconds after its message
+    write_json(mood_path(tmp_path), [
+        {"id": first, "timestamp": "2026-01-01 10:00:03", "sentiment": "neutral", "score": 5},
+        {"id": second, "timestamp": "2026-01-01 10:05:03", "sentiment": "neutral", "score": 5},
+    ])
+
+    assert rescore_user("kid", history_dir, str(tmp_path / "mood")) == ("kid", 2)
+    assert [entry["id"] for entry in read_json(mood_path(tmp_path))] == [first, second]
+
+
+def test_records_for_newer_messages_are_kept(tmp_path):
+    history_dir = str(tmp_path / "history")
+    first = send(history_dir, "I am happy", "2026-01-01 10:00:00")
+    # Written by the app for a message that reached the log after the rescore read it
+    newer = {"id": first + 2, "timestamp": "2026-01-01 10:00:01", "sentiment": "positive", "score": 8}
+    write_json(mood_path(tmp_path), [
+        {"timestamp": "2026-01-01 10:00:03", "sentiment": "neutral", "score": 5},
+        newer,
+    ])
+
+    rescore_user("kid", history_dir, str(tmp_path / "mood"))
+    entries = read_json(mood_path(tmp_path))
+    assert [entry["id"] for entry in entries] == [first, newer["id"]]
+    assert entries[1] == newer
@@ -0,0 +1,62 @@
+"""The stored login bundle must match what the separate files would give.
+
+Run from the directory that contains src/:  python -m pytest src/tests
+"""
+from src import chat_store
+from src.json_store import write_json
+from src.user_profile import ProfileCache, read_profile
+from src.user_store import UserStore
+
+
+def setup(tmp_path):
+    paths = {
+        "history_dir": str(tmp_path / "history"),
+        "mood_dir": str(tmp_path / "mood"),
+        "achievement_dir": str(tmp_path / "achievements"),
+    }
+    store = UserStore(str(tmp_path / "users.db"))
+    store.create_user("kid", {"password_hash": "x", "points": 10})
+    chat_store.append_messages(
+        "kid", [{"role": "user" if i % 2 == 0 else "assistant", "content": str(i), "timestamp": ""} for i in range(7)],
+        paths["history_dir"],
+    )
+    write_json(str(tmp_path / "mood" / "kid_mood.json"), [
+        {"id": 0, "timestamp": "2026-01-01 10:00:00", "sentiment": "positive", "score": 4},
+        {"id": 2, "timestamp": "2026-01-01 10:01:00", "sentiment": "negative", "score": 2},
+    ])
+    write_json(str(tmp_path / "achievements" / "kid_achievements.json"), [{"title": "Curious Learner"}])
+    return store, paths
+
+
+def test_bundle_is_stored_on_first_read(tmp_path):
+    store, paths = setup(tmp_path)
+    rebuilt = read_profile("kid", store, page_size=5, **paths)
+    assert [message["id"] for message in rebuilt.history] == [2, 3, 4, 5, 6]
+    assert (rebuilt.has_older, rebuilt.history_total, rebuilt.history_user_total) == (True, 7, 4)
+    assert rebuilt.mood_summary["count"] == 2 and rebuilt.mood_summary["total"] == 6
+    assert rebuilt.mood_summary["last"]["score"] == 2
+    assert rebuilt.user["points"] == 10
+
+    # The second read comes from the bundles table alone
+    (tmp_path / "mood" / "kid_mood.json").unlink()
+    chat_store.clear_history("kid", paths["history_dir"])
+    assert read_profile("kid", store, page_size=5, **paths) == rebuilt
+    assert read_profile("kid", store, page_size=3, **paths).history == rebuilt.history[-3:]
+
+
+def test_noted_changes_are_stored(tmp_path):
+    store, paths = setup(tmp_path)
+    cache = ProfileCache()
+    cache.put("kid", read_profile("kid", store, page_size=5, **paths))
+    messages = [{"id": 7, "role": "user", "content": "7", "timestamp": ""}]
+    cache.note_messages("kid", messages, 5)
+    cache.note_mood("kid", {"id": 7, "timestamp": "2026-01-01 10:02:00", "sentiment": "neutral", "score": 3})
+    store.put_bundle("kid", cache.stored("kid"))
+
+    bundle = read_profile("kid", store, page_size=5, **paths)
+    assert bundle == cache.get("kid")
+    assert bundle.history[-1]["id"] == 7 and bundle.history_user_total == 5
+    assert bundle.mood_summary["count"] == 3 and bundle.mood_summary["total"] == 9
+
+    cache.invalidate("kid")
+    assert cache.stored("kid") is None
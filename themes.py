@@ -0,0 +1,311 @@
+"""Chat themes and their generated page CSS.
+
+The stylesheet for a theme is formatted once per process and reused on every
+rerun. Background images are served from the app's static/ folder when they
+have been downloaded there (run ``python -m src.themes``) and Streamlit's
+static file serving is on; otherwise the Unsplash URLs are used.
+"""
+import os
+import urllib.request
+
+import streamlit as st
+
+from src.shared_cache import resource
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+BACKGROUND_DIR = os.path.join(STATIC_DIR, "backgrounds")
+
+THEMES = {
+    "default": {
+        "primary_color": "#4CAF50",
+        "image_url": "https://images.unsplash.com/photo-1557682250-33bd709cbe85?q=80&w=2000",
+        "card_bg": "rgba(255, 255, 255, 0.8)",
+        "user_bubble": "#dcf8c6",
+        "bot_bubble": "#f1f0f0",
+        "accent_color": "#FF5722",
+    },
+    "space": {
+        "primary_color": "#3F51B5",
+        "image_url": "https://images.unsplash.com/photo-1534796636912-3b95b3ab5986?q=80&w=2000",
+        "card_bg": "rgba(0, 0, 20, 0.7)",
+        "user_bubble": "#4CAF50",
+        "bot_bubble": "#7986CB",
+        "accent_color": "#FF9800",
+    },
+    "ocean": {
+        "primary_color": "#039BE5",
+        "image_url": "https://images.unsplash.com/photo-1518837695005-2083093ee35b?q=80&w=2000",
+        "card_bg": "rgba(255, 255, 255, 0.7)",
+        "user_bubble": "#80DEEA",
+        "bot_bubble": "#B3E5FC",
+        "accent_color": "#FF5722",
+    },
+    "forest": {
+        "primary_color": "#388E3C",
+        "image_url": "https://images.unsplash.com/photo-1448375240586-882707db888b?q=80&w=2000",
+        "card_bg": "rgba(255, 255, 255, 0.8)",
+        "user_bubble": "#C5E1A5",
+        "bot_bubble": "#DCEDC8",
+        "accent_color": "#FF9800",
+    },
+    "sunset": {
+        "primary_color": "#E64A19",
+        "image_url": "https://images.unsplash.com/photo-1530508777238-14544088c3ed?q=80&w=2000",
+        "card_bg": "rgba(255, 255, 255, 0.7)",
+        "user_bubble": "#FFCCBC",
+        "bot_bubble": "#FFECB3",
+        "accent_color": "#673AB7",
+    }
+}
+
+
+def _background_file(name):
+    return os.path.join(BACKGROUND_DIR, f"{name}.jpg")
+
+
+def background_url(name):
+    """URL of the theme's background image, preferring the locally served copy."""
+    if st.get_option("server.enableStaticServing") and os.path.exists(_background_file(name)):
+        # Streamlit serves <app dir>/static/ under app/static/
+        return f"app/static/backgrounds/{name}.jpg"
+    return THEMES[name]["image_url"]
+
+
+@resource()
+def theme_css(name):
+    """The <style> block for a theme, built once per theme and process and shared by every session."""
+    theme = THEMES[name]
+    background = background_url(name)
+    return f"""
+    <style>
+    .stApp {{
+        background: url('{background}');
+        background-size: cover;
+        background-attachment: fixed;
+    }}
+    .card {{
+        background-color: {theme["card_bg"]};
+        border-radius: 15px;
+        padding: 20px;
+        margin-bottom: 20px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        backdrop-filter: blur(10px);
+    }}
+    .stButton button {{
+        background-color: {theme["primary_color"]} !important;
+        color: white !important;
+        border-radius: 20px !important;
+        border: none !important;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.2) !important;
+        transition: all 0.3s ease !important;
+    }}
+    .stButton button:hover {{
+        transform: translateY(-2px) !important;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.3) !important;
+    }}
+    .chat-message {{
+        padding: 15px;
+        border-radius: 15px;
+        margin-bottom: 10px;
+        display: flex;
+        flex-direction: column;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+        animation: fadeIn 0.5s;
+    }}
+    .user-message {{
+        background-color: {theme["user_bubble"]};
+        margin-left: 50px;
+        border-top-right-radius: 5px;
+    }}
+    .bot-message {{
+        background-color: {theme["bot_bubble"]};
+        margin-right: 50px;
+        border-top-left-radius: 5px;
+    }}
+    .message-timestamp {{
+        font-size: 0.8rem;
+        color: #888;
+        align-self: flex-end;
+    }}
+    .sidebar .stButton button {{
+        width: 100%;
+        margin-bottom: 10px;
+    }}
+    .achievement {{
+        background: linear-gradient(135deg, {theme["primary_color"]}22, {theme["accent_color"]}22);
+        border-left: 5px solid {theme["primary_color"]};
+        padding: 15px;
+        border-radius: 10px;
+        margin-bottom: 15px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+        transition: transform 0.3s ease;
+    }}
+    .achievement:hover {{
+        transform: translateY(-5px);
+        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+    }}
+    .badge-item {{
+        display: inline-block;
+        margin: 5px;
+        padding: 8px 15px;
+        background-color: {theme["primary_color"]};
+        color: white;
+        border-radius: 20px;
+        font-size: 0.9rem;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+        transition: all 0.3s ease;
+    }}
+    .badge-item:hover {{
+        transform: scale(1.05);
+    }}
+    .stats-box {{
+        background-color: rgba(255, 255, 255, 0.9);
+        border-radius: 12px;
+        padding: 15px;
+        margin: 5px;
+        text-align: center;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        border-left: 5px solid {theme["primary_color"]};
+        transition: all 0.3s ease;
+    }}
+    .stats-box:hover {{
+        transform: translateY(-5px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
+    }}
+    .page-title {{
+        color: {theme["primary_color"]};
+        margin-bottom: 20px;
+        text-shadow: 1px 1px 2px rgba(0,0,0,0.1);
+        font-size: 2.2rem;
+        font-weight: bold;
+    }}
+    .stTabs [data-baseweb="tab-list"] {{
+        gap: 24px;
+    }}
+    .stTabs [data-baseweb="tab"] {{
+        height: 50px;
+        white-space: pre-wrap;
+        background-color: white;
+        border-radius: 4px 4px 0px 0px;
+        gap: 1px;
+        padding-top: 10px;
+        padding-bottom: 10px;
+        transition: all 0.3s ease;
+    }}
+    .stTabs [aria-selected="true"] {{
+        background-color: {theme["primary_color"]} !important;
+        color: white !important;
+        transform: translateY(-3px);
+    }}
+    .stProgress > div > div > div > div {{
+        background-color: {theme["primary_color"]};
+    }}
+    .points-animation {{
+        position: fixed;
+        color: {theme["accent_color"]};
+        font-weight: bold;
+        z-index: 9999;
+        animation: floatUp 2s forwards;
+    }}
+    @keyframes fadeIn {{
+        from {{ opacity: 0; transform: translateY(10px); }}
+        to {{ opacity: 1; transform: translateY(0); }}
+    }}
+    @keyframes floatUp {{
+        0% {{ opacity: 0; transform: translateY(20px); }}
+        10% {{ opacity: 1; }}
+        80% {{ opacity: 1; }}
+        100% {{ opacity: 0; transform: translateY(-50px); }}
+    }}
+    .login-form-container {{
+        transition: all 0.5s ease;
+        transform: scale(1);
+    }}
+    .login-form-container:hover {{
+        transform: scale(1.02);
+    }}
+    .input-container {{
+        position: relative;
+        margin-bottom: 20px;
+    }}
+    .input-container input {{
+        width: 100%;
+        padding: 12px 15px;
+        border: 2px solid #ddd;
+        border-radius: 10px;
+        font-size: 16px;
+        transition: all 0.3s;
+    }}
+    .input-container input:focus {{
+        border-color: {theme["primary_color"]};
+        box-shadow: 0 0 8px {theme["primary_color"]}80;
+    }}
+    .input-container label {{
+        position: absolute;
+        top: -10px;
+        left: 10px;
+        background-color: white;
+        padding: 0 5px;
+        font-size: 12px;
+        color: #555;
+    }}
+    .chat-input {{
+        border-radius: 30px !important;
+        padding: 12px 20px !important;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.1) !important;
+        border: 2px solid transparent !important;
+        transition: all 0.3s ease !important;
+    }}
+    .chat-input:focus {{
+        border-color: {theme["primary_color"]} !important;
+        box-shadow: 0 2px 15px rgba(0,0,0,0.15) !important;
+    }}
+    .theme-selector {{
+        border-radius: 8px;
+        overflow: hidden;
+        transition: all 0.3s ease;
+    }}
+    .theme-selector:hover {{
+        transform: translateY(-3px);
+        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+    }}
+    .level-indicator {{
+        background: linear-gradient(90deg, {theme["primary_color"]}, {theme["accent_color"]});
+        color: white;
+        padding: 5px 15px;
+        border-radius: 20px;
+        font-weight: bold;
+        display: inline-block;
+        margin-top: 5px;
+    }}
+    .settings-option {{
+        padding: 15px;
+        margin-bottom: 10px;
+        border-radius: 10px;
+        background-color: white;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+        transition: all 0.3s ease;
+    }}
+    .settings-option:hover {{
+        transform: translateY(-3px);
+        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+    }}
+    </style>
+    """
+
+
+def download_backgrounds(overwrite=False):
+    """Fetch every theme's background image into static/backgrounds/."""
+    os.makedirs(BACKGROUND_DIR, exist_ok=True)
+    for name, theme in THEMES.items():
+        path = _background_file(name)
+        if os.path.exists(path) and not overwrite:
+            continue
+        print(f"Downloading {name} background...")
+        urllib.request.urlretrieve(theme["image_url"], path + ".tmp")
+        os.replace(path + ".tmp", path)
+    theme_css.clear()
+
+
+if __name__ == "__main__":
+    download_backgrounds()
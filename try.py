@@ -1,5 +1,5 @@
 import streamlit as st
-from src.helper import voice_input, llm_model_object, text_to_speech
+from src.helper import voice_input, llm_model_object, text_to_speech_bytes, speech_format
 
 def main():
     st.title("Empathetic Response Chat Bot 🤖")
@@ -21,21 +21,17 @@ def main():
                 # Generate response
                 response = llm_model_object(text)
                 
-                # Convert response to speech
-                text_to_speech(response)
-                
-                # Read audio file
-                audio_file = open("speech.mp3", "rb")
-                audio_bytes = audio_file.read()
+                # Convert response to speech in memory
+                audio_bytes = text_to_speech_bytes(response)
                 
                 # Display response and audio options
                 st.text_area("Response:", response, height=200)
-                st.audio(audio_bytes)
+                st.audio(audio_bytes, format=speech_format()[0])
                 st.download_button(
                     "Download Speech",
                     data=audio_bytes,
-                    file_name="speech.mp3",
-                    mime="audio/mp3"
+                    file_name=f"speech.{speech_format()[1]}",
+                    mime=speech_format()[0]
                 )
     
     elif input_method == "Text":
@@ -45,21 +41,17 @@ def main():
             # Generate response based on text input
             response = llm_model_object(user_input)
             
-            # Convert response to speech
-            text_to_speech(response)
-            
-            # Read audio file
-            audio_file = open("speech.mp3", "rb")
-            audio_bytes = audio_file.read()
+            # Convert response to speech in memory
+            audio_bytes = text_to_speech_bytes(response)
             
             # Display response and audio options
             st.text_area("Response:", response, height=200)
-            st.audio(audio_bytes)
+            st.audio(audio_bytes, format=speech_format()[0])
             st.download_button(
                 "Download Speech",
                 data=audio_bytes,
-                file_name="speech.mp3",
-                mime="audio/mp3"
+                file_name=f"speech.{speech_format()[1]}",
+                mime=speech_format()[0]
             )
 
 if __name__ == '__main__':
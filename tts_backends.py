@@ -0,0 +1,130 @@
+"""Pluggable text-to-speech backends for spoken replies.
+
+TTS_BACKEND picks the engine for a deployment:
+
+    gtts     Google Translate TTS through gTTS (default, needs network), MP3
+    pyttsx3  the OS speech engine (espeak, SAPI5, NSSpeech) on CPU, offline, WAV
+    piper    Piper neural voices on CPU, offline; voice model at PIPER_MODEL_PATH, WAV
+
+Each backend turns text into a complete audio file in memory and reports
+the MIME type and file extension to play or save it with. Local engines
+are loaded once per process. split_sentences() breaks long replies up so
+they can be synthesized and played a sentence at a time.
+"""
+import io
+import os
+import re
+import tempfile
+import threading
+import wave
+
+from gtts import gTTS
+
+from src.shared_cache import resource
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+PIPER_MODEL_PATH = os.getenv("PIPER_MODEL_PATH", "data/models/piper/en_US-lessac-medium.onnx")
+MIN_SENTENCE_CHARS = 20  # Shorter fragments ("Sure!") are merged into the next sentence
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+def split_sentences(text):
+    """Split text into sentences, merging very short ones with the sentence after."""
+    sentences = []
+    pending = ""
+    for piece in _SENTENCE_END.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class GTTSBackend:
+    name = "gtts"
+    mime = "audio/mpeg"
+    extension = "mp3"
+
+    def synthesize(self, text, lang="en"):
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class Pyttsx3Backend:
+    name = "pyttsx3"
+    mime = "audio/wav"
+    extension = "wav"
+
+    def __init__(self):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        # The engine runs one utterance at a time
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang="en"):
+        # pyttsx3 can only render to a file; the voice is whatever the OS engine is set to, lang is ignored
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                self.engine.save_to_file(text, path)
+                self.engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+class PiperBackend:
+    name = "piper"
+    mime = "audio/wav"
+    extension = "wav"
+
+    def __init__(self, model_path=PIPER_MODEL_PATH):
+        from piper.voice import PiperVoice
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"Piper voice not found at {model_path}; download a .onnx voice and its .onnx.json from "
+                "https://huggingface.co/rhasspy/piper-voices and set PIPER_MODEL_PATH"
+            )
+        self.voice = PiperVoice.load(model_path)
+
+    def synthesize(self, text, lang="en"):
+        # The voice model fixes the language, so lang is ignored
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            if hasattr(self.voice, "synthesize_wav"):
+                self.voice.synthesize_wav(text, wav_file)  # piper-tts >= 1.3
+            else:
+                self.voice.synthesize(text, wav_file)
+        return buffer.getvalue()
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+    "piper": PiperBackend,
+}
+
+
+@resource()
+def _load_backend(name):
+    # Built once per process; concurrent first calls wait for the same instance
+    return BACKENDS[name]()
+
+
+def get_backend(name=None):
+    """Return the process-wide backend called name (default: TTS_BACKEND), shared by every session."""
+    name = (name or TTS_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return _load_backend(name)
@@ -0,0 +1,125 @@
+"""Content-addressed cache of synthesized speech.
+
+Audio is keyed by a SHA-256 of (voice, lang, text), where voice is the TTS
+backend that rendered it, so repeated replies such as greetings and fallback
+messages play back without another synthesis call.
+Entries live in a small in-memory LRU backed by a larger on-disk LRU; both
+are bounded by total bytes.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+TTS_CACHE_DIR = "data/tts_cache"
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_MB", "256")) * 1024 * 1024
+
+
+def cache_key(text, lang, voice="gtts"):
+    return hashlib.sha256(f"{voice}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory=TTS_CACHE_DIR, memory_limit=TTS_CACHE_MEMORY_BYTES, disk_limit=TTS_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes, least recently used first
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Rebuild the disk LRU from what a previous process left behind, oldest access first
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".audio"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-6], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def _remember(self, key, audio_bytes):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio_bytes
+        self._memory_bytes += len(audio_bytes)
+        while self._memory_bytes > self.memory_limit and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, text, lang="en", voice="gtts"):
+        key = cache_key(text, lang, voice)
+        with self._lock:
+            audio_bytes = self._memory.get(key)
+            if audio_bytes is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio_bytes
+            if key in self._disk:
+                try:
+                    with open(self._path(key), "rb") as f:
+                        audio_bytes = f.read()
+                    os.utime(self._path(key))
+                except OSError:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self._remember(key, audio_bytes)
+                    self.disk_hits += 1
+                    return audio_bytes
+            self.misses += 1
+            return None
+
+    def put(self, text, lang, audio_bytes, voice="gtts"):
+        key = cache_key(text, lang, voice)
+        with self._lock:
+            self._remember(key, audio_bytes)
+            if key in self._disk or len(audio_bytes) > self.disk_limit:
+                return
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio_bytes)
+            os.replace(tmp_path, self._path(key))
+            self._disk[key] = len(audio_bytes)
+            self._disk_bytes += len(audio_bytes)
+            while self._disk_bytes > self.disk_limit:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def get_or_create(self, text, lang, synthesize, voice="gtts"):
+        """Return cached audio for (voice, lang, text), calling synthesize() and caching the result on a miss."""
+        audio_bytes = self.get(text, lang, voice)
+        if audio_bytes is None:
+            audio_bytes = synthesize()
+            self.put(text, lang, audio_bytes, voice)
+        return audio_bytes
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
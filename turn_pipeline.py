@@ -0,0 +1,108 @@
+"""Run the stages of a chat turn as a small task graph.
+
+Stages that don't depend on each other (sentiment scoring and the history
+write for the user's message) run on a shared worker pool while the script
+thread streams the LLM reply. A stage starts as soon
+as the stages it comes after have finished, without tying up a worker
+while it waits. Stages that have to run on the script thread (anything
+that draws to the page or reads st.session_state) are timed with
+stage(), so every turn gets one timing table covering both kinds.
+
+Worker stages only see the arguments they are given: snapshot what they
+need from st.session_state on the script thread, because session state
+isn't available from worker threads.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+TURN_WORKERS = int(os.getenv("TURN_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=TURN_WORKERS, thread_name_prefix="turn")
+
+
+class TurnPipeline:
+    def __init__(self, executor=None):
+        self.executor = executor or _executor
+        self.started = time.perf_counter()
+        # name -> {"start": seconds into the turn, "duration": seconds, "thread": "script" or "worker"}
+        self.timings = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name, start, thread):
+        with self._lock:
+            self.timings[name] = {
+                "start": start - self.started,
+                "duration": time.perf_counter() - start,
+                "thread": thread,
+            }
+
+    def _timed(self, name, fn, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._record(name, start, "worker")
+
+    def submit(self, name, fn, *args, after=(), **kwargs):
+        """Run fn(*args, **kwargs) on the pool once the stages named in after have finished."""
+        task = Future()
+        self._tasks[name] = task
+        dependencies = [self._tasks[dependency] for dependency in after]
+        remaining = [len(dependencies)]
+
+        def start():
+            for dependency_name, dependency in zip(after, dependencies):
+                if dependency.exception() is not None:
+                    task.set_exception(RuntimeError(f"stage {dependency_name!r} failed: {dependency.exception()}"))
+                    return
+            self.executor.submit(self._timed, name, fn, args, kwargs).add_done_callback(
+                lambda future: task.set_exception(future.exception()) if future.exception() is not None
+                else task.set_result(future.result())
+            )
+
+        def dependency_done(_):
+            with self._lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                start()
+
+        if not dependencies:
+            start()
+        for dependency in dependencies:
+            dependency.add_done_callback(dependency_done)
+        return task
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block that runs on the script thread."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, "script")
+
+    def result(self, name):
+        """Wait for a stage and return its result, timing the wait as "<name> (wait)"."""
+        start = time.perf_counter()
+        try:
+            return self._tasks[name].result()
+        finally:
+            self._record(f"{name} (wait)", start, "script")
+
+    def wait(self):
+        """Wait for every stage; re-raises the first failure once all of them are done."""
+        failure = None
+        for name, task in list(self._tasks.items()):
+            exception = task.exception()
+            if exception is not None and failure is None:
+                failure = exception
+        self.timings["total"] = {"start": 0.0, "duration": time.perf_counter() - self.started, "thread": "script"}
+        if failure is not None:
+            raise failure
+        return self.timings
+
@@ -0,0 +1,199 @@
+"""Per-user login bundle: one stored read at login, cached per process.
+
+A ProfileBundle holds everything a session needs when a user logs in: the
+user row, the newest page of chat history with its counts, a summary of
+the mood log (count, total score, last record) and the achievements.
+Everything but the user row, which authenticate already fetched, is
+stored as one row in the users DB's bundles table, so read_profile() is a
+single SELECT. A user without a stored bundle (first login, or after it
+was dropped) gets one rebuilt from the separate history, mood and
+achievement files, which is then stored. The full mood log isn't part of
+the bundle; the Stats chart reads it when it is first drawn.
+
+ProfileCache keeps bundles in memory so a re-login or a second tab for
+the same user starts without touching the disk. The app keeps cached
+bundles current as it writes (note_* calls mirror the write-behind
+updates) and queues stored() through the write-behind buffer after each
+turn, so the stored bundle follows the files it summarizes. A change
+that is easier to reload than to patch (deleted messages, cleared
+history, new password) drops the cached bundle, and with it the stored
+one. Every noted change also bumps the user's version(), which keys the
+app's per-user Streamlit caches. The cache only sees this process's
+writes; several app processes sharing one data/ directory would each
+need their own invalidation.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from src import chat_store
+from src.json_store import read_json
+
+PROFILE_CACHE_MAX_USERS = int(os.getenv("PROFILE_CACHE_MAX_USERS", "256"))
+
+ProfileBundle = namedtuple(
+    "ProfileBundle", "user history has_older history_total history_user_total mood_summary achievements"
+)
+
+
+def summarize_moods(mood_data):
+    """{"count", "total", "last"} for a mood log; kept current with add_mood rather than recomputed."""
+    summary = {"count": 0, "total": 0, "last": None}
+    for record in mood_data:
+        summary = add_mood(summary, record)
+    return summary
+
+
+def add_mood(summary, record):
+    return {"count": summary["count"] + 1, "total": summary["total"] + record["score"], "last": dict(record)}
+
+
+class ProfileCache:
+    def __init__(self, max_users=PROFILE_CACHE_MAX_USERS):
+        self.max_users = max_users
+        self._bundles = OrderedDict()  # username -> ProfileBundle, least recently used first
+        self._versions = {}  # username -> number of changes noted, including ones to uncached users
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        with self._lock:
+            bundle = self._bundles.get(username)
+            if bundle is None:
+                self.misses += 1
+                return None
+            self._bundles.move_to_end(username)
+            self.hits += 1
+            return _copy(bundle)
+
+    def peek_user(self, username):
+        """The cached user row, without counting a lookup."""
+        with self._lock:
+            bundle = self._bundles.get(username)
+            return dict(bundle.user) if bundle is not None else None
+
+    def stored(self, username):
+        """The cached bundle as it is stored (without the user row), or None if it isn't cached."""
+        with self._lock:
+            bundle = self._bundles.get(username)
+            return _stored(_copy(bundle)) if bundle is not None else None
+
+    def put(self, username, bundle):
+        with self._lock:
+            self._bundles[username] = _copy(bundle)
+            self._bundles.move_to_end(username)
+            while len(self._bundles) > self.max_users:
+                self._bundles.popitem(last=False)
+
+    def version(self, username):
+        """Changes to username's data noted so far; anything derived from an older version is stale."""
+        with self._lock:
+            return self._versions.get(username, 0)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._bundles.pop(username, None)
+            self._versions[username] = self._versions.get(username, 0) + 1
+
+    def _patch(self, username, **changes):
+        with self._lock:
+            self._versions[username] = self._versions.get(username, 0) + 1
+            bundle = self._bundles.get(username)
+            if bundle is not None:
+                self._bundles[username] = bundle._replace(**{name: change(bundle) for name, change in changes.items()})
+
+    def note_user(self, username, fields):
+        self._patch(username, user=lambda bundle: {**bundle.user, **fields})
+
+    def note_messages(self, username, messages, page_size):
+        user_messages = sum(1 for message in messages if message["role"] == "user")
+        self._patch(
+            username,
+            history=lambda bundle: (bundle.history + list(messages))[-page_size:],
+            has_older=lambda bundle: bundle.has_older or len(bundle.history) + len(messages) > page_size,
+            history_total=lambda bundle: bundle.history_total + len(messages),
+            history_user_total=lambda bundle: bundle.history_user_total + user_messages,
+        )
+
+    def note_mood(self, username, record):
+        self._patch(username, mood_summary=lambda bundle: add_mood(bundle.mood_summary, record))
+
+    def note_achievements(self, username, achievements):
+        self._patch(username, achievements=lambda bundle: list(achievements))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._bundles),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _copy(bundle):
+    # Sessions append to their own lists, so nobody shares a list with the cache
+    return bundle._replace(
+        user=dict(bundle.user),
+        history=list(bundle.history),
+        mood_summary=dict(bundle.mood_summary),
+        achievements=list(bundle.achievements),
+    )
+
+
+def _stored(bundle):
+    return {name: value for name, value in bundle._asdict().items() if name != "user"}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_profile_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProfileCache()
+        return _cache
+
+
+def read_profile(username, user_store, user=None, history_dir=chat_store.CHAT_HISTORY_DIR,
+                 mood_dir="data/mood_data", achievement_dir="data/achievements", page_size=50):
+    """Read a user's bundle from the bundles table, rebuilding and storing it if there is none.
+
+    user is the already-fetched row, if there is one. Pending write-behind
+    changes for the user must be flushed first.
+    """
+    if user is None:
+        user = user_store.get_user(username)
+    stored = user_store.get_bundle(username)
+    if stored is None:
+        chat_store.convert_legacy_history(username, history_dir)
+        history, has_older = chat_store.read_page(username, limit=page_size, history_dir=history_dir)
+        history_total, history_user_total = chat_store.history_counts(username, history_dir)
+        stored = {
+            "history": history,
+            "has_older": has_older,
+            "history_total": history_total,
+            "history_user_total": history_user_total,
+            "mood_summary": summarize_moods(read_json(os.path.join(mood_dir, f"{username}_mood.json"), default=[])),
+            "achievements": read_json(os.path.join(achievement_dir, f"{username}_achievements.json"), default=[]),
+        }
+        user_store.put_bundle(username, stored)
+    elif len(stored["history"]) > page_size:
+        # Stored with a larger page size
+        stored["history"] = stored["history"][-page_size:]
+        stored["has_older"] = True
+    return ProfileBundle(user=user, **stored)
+
+
+def load_profile(username, user_store, user=None, **paths):
+    """Return the user's bundle from the process cache, reading it from the users DB on a miss."""
+    cache = get_profile_cache()
+    bundle = cache.get(username)
+    if bundle is None:
+        bundle = read_profile(username, user_store, user, **paths)
+        cache.put(username, bundle)
+    return bundle
@@ -0,0 +1,155 @@
+"""SQLite-backed user storage with one row per user.
+
+Replaces the monolithic data/users.json: logins and profile updates touch a
+single row instead of loading and rewriting every account. The bundles
+table next to it holds each user's stored login bundle (see user_profile).
+"""
+import json
+import os
+import sqlite3
+import threading
+
+USERS_DB_PATH = "data/users.db"
+LEGACY_USERS_JSON = "data/users.json"
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class UserStore:
+    """Repository over the users table.
+
+    A user record is the same dict users.json held: password_hash plus the
+    profile fields (points, badges, streak, theme, ...). password_hash gets
+    its own column; everything else lives in a JSON column.
+    """
+
+    def __init__(self, path=USERS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " username TEXT PRIMARY KEY,"
+            " password_hash TEXT NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bundles ("
+            " username TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL)"
+        )
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across threads, and Streamlit runs each session on its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_user(self, username):
+        row = self._connection().execute(
+            "SELECT password_hash, data FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = json.loads(row[1])
+        user["password_hash"] = row[0]
+        return user
+
+    def create_user(self, username, record):
+        """Insert a new user; returns False if the username is already taken."""
+        data = {k: v for k, v in record.items() if k != "password_hash"}
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO users (username, password_hash, data) VALUES (?, ?, ?)",
+            (username, record["password_hash"], json.dumps(data)),
+        )
+        return cursor.rowcount == 1
+
+    def update_user(self, username, **fields):
+        """Merge fields into one user's record in a single transaction."""
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent sessions can't interleave read-modify-write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT password_hash, data FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            password_hash = fields.pop("password_hash", row[0])
+            data = json.loads(row[1])
+            data.update(fields)
+            conn.execute(
+                "UPDATE users SET password_hash = ?, data = ? WHERE username = ?",
+                (password_hash, json.dumps(data), username),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_bundle(self, username):
+        """The user's stored login bundle, or None if there isn't one."""
+        row = self._connection().execute(
+            "SELECT data FROM bundles WHERE username = ?", (username,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_bundle(self, username, bundle):
+        """Store the user's login bundle, replacing the old one; None deletes it."""
+        if bundle is None:
+            self._connection().execute("DELETE FROM bundles WHERE username = ?", (username,))
+        else:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO bundles (username, data) VALUES (?, ?)", (username, json.dumps(bundle))
+            )
+
+    def import_users(self, users):
+        """Bulk-insert a users.json style dict, keeping any rows that already exist."""
+        rows = [
+            (name, user["password_hash"], json.dumps({k: v for k, v in user.items() if k != "password_hash"}))
+            for name, user in users.items()
+        ]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (username, password_hash, data) VALUES (?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+
+def migrate_json_users(store, json_path=LEGACY_USERS_JSON):
+    """One-shot import of the old users.json; the file is renamed so it only runs once."""
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r") as f:
+        users = json.load(f)
+    imported = store.import_users(users)
+    os.replace(json_path, json_path + ".migrated")
+    print(f"Migrated {imported} users from {json_path} to {store.path}")
+    return imported
+
+
+def get_user_store(path=USERS_DB_PATH):
+    """Return the process-wide store for path, migrating users.json on first use."""
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = UserStore(path)
+                migrate_json_users(store, os.path.join(os.path.dirname(path), "users.json"))
+                _stores[path] = store
+    return store
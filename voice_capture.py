@@ -0,0 +1,179 @@
+"""Microphone capture that never blocks the Streamlit script thread.
+
+One Recognizer is shared by every capture and calibrated against ambient
+noise once, on first use. Audio is read in chunks and an energy-based voice
+activity detector decides when speech starts and ends. Every capture is
+bounded: it gives up after VOICE_TIMEOUT_SECONDS without speech, cuts a
+phrase at VOICE_PHRASE_LIMIT_SECONDS and never runs longer than the two
+together. Captures run on a background thread and the page polls the
+returned VoiceJob. Captured chunks are streamed to the speech-to-text backend
+(see stt_backends) while the user is still speaking.
+
+Any speech_recognition AudioSource works as the input, so sr.AudioFile
+with a WAV fixture can stand in for the microphone:
+
+    VoiceCapture(lambda: sr.AudioFile("hello.wav"), calibration_seconds=0).listen()
+"""
+import audioop
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from src.stt_backends import get_backend
+
+VOICE_TIMEOUT_SECONDS = float(os.getenv("VOICE_TIMEOUT_SECONDS", "5"))
+VOICE_PHRASE_LIMIT_SECONDS = float(os.getenv("VOICE_PHRASE_LIMIT_SECONDS", "15"))
+VOICE_PAUSE_SECONDS = 0.8  # Silence that ends a phrase
+VOICE_PRE_ROLL_SECONDS = 0.3  # Audio kept from just before speech starts, so first syllables aren't clipped
+CALIBRATION_SECONDS = 1.0
+
+
+class VoiceCapture:
+    def __init__(self, source_factory=sr.Microphone, recognizer=None, calibration_seconds=CALIBRATION_SECONDS,
+                 timeout=VOICE_TIMEOUT_SECONDS, phrase_limit=VOICE_PHRASE_LIMIT_SECONDS, pause=VOICE_PAUSE_SECONDS,
+                 backend=None):
+        self.source_factory = source_factory
+        self.recognizer = recognizer or sr.Recognizer()
+        self.backend = backend
+        self.calibration_seconds = calibration_seconds
+        self.timeout = timeout
+        self.phrase_limit = phrase_limit
+        self.pause = pause
+        self._calibrated = calibration_seconds <= 0
+        # There is only one microphone, so captures take turns
+        self._lock = threading.Lock()
+
+    def listen(self, cancelled=None, start_stream=None):
+        """Capture one phrase; returns sr.AudioData, or None on timeout, silence or cancel.
+
+        If given, start_stream(sample_rate, sample_width) is called when speech
+        starts and must return an object whose feed(chunk) receives each chunk
+        of the phrase as it is captured.
+        """
+        with self._lock:
+            with self.source_factory() as source:
+                if not self._calibrated:
+                    print("Calibrating for ambient noise...")
+                    self.recognizer.adjust_for_ambient_noise(source, duration=self.calibration_seconds)
+                    self._calibrated = True
+                print("Listening...")  # Debug message to see when the microphone is activated
+                return self._capture(source, cancelled or threading.Event(), start_stream)
+
+    def _capture(self, source, cancelled, start_stream=None):
+        chunk_seconds = source.CHUNK / source.SAMPLE_RATE
+        threshold = self.recognizer.energy_threshold
+        pre_roll = deque(maxlen=max(1, math.ceil(VOICE_PRE_ROLL_SECONDS / chunk_seconds)))
+        frames = []
+        stream = None
+        waited = spoken = silence = 0.0
+        deadline = time.monotonic() + self.timeout + self.phrase_limit
+        while not cancelled.is_set() and time.monotonic() < deadline:
+            buffer = source.stream.read(source.CHUNK)
+            if not buffer:
+                break  # End of a file source
+            loud = audioop.rms(buffer, source.SAMPLE_WIDTH) > threshold
+            if not frames:
+                pre_roll.append(buffer)
+                if loud:
+                    frames.extend(pre_roll)
+                    if start_stream is not None:
+                        stream = start_stream(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                        for chunk in pre_roll:
+                            stream.feed(chunk)
+                    continue
+                waited += chunk_seconds
+                if waited >= self.timeout:
+                    break
+            else:
+                frames.append(buffer)
+                if stream is not None:
+                    stream.feed(buffer)
+                spoken += chunk_seconds
+                silence = 0.0 if loud else silence + chunk_seconds
+                if silence >= self.pause or spoken >= self.phrase_limit:
+                    break
+        if cancelled.is_set() or not frames:
+            return None
+        print("Audio captured.")  # Debug message after audio is captured
+        return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def _backend(self):
+        if self.backend is None:
+            self.backend = get_backend()
+        return self.backend
+
+    def transcribe(self, audio):
+        text = self._backend().transcribe(audio)
+        if text:
+            print(f"You said: {text}")  # Debug the recognized text
+        return text
+
+    def listen_and_transcribe(self, cancelled=None):
+        # Recognition runs alongside capture, so only the tail is left when the phrase ends
+        streams = []
+
+        def start_stream(sample_rate, sample_width):
+            streams.append(self._backend().start_stream(sample_rate, sample_width))
+            return streams[0]
+
+        audio = self.listen(cancelled, start_stream)
+        if audio is None or (cancelled is not None and cancelled.is_set()):
+            return None
+        text = streams[0].finish()
+        if text:
+            print(f"You said: {text}")  # Debug the recognized text
+        return text
+
+
+class VoiceJob:
+    """Handle for one background capture; result() is the recognized text, or None."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self.error = None
+        self.future = None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        if self._cancelled.is_set() or self.future.cancelled():
+            return None
+        return self.future.result()
+
+    def _run(self, capture):
+        try:
+            return capture.listen_and_transcribe(self._cancelled)
+        except Exception as e:
+            # Usually no microphone (or no PyAudio) on this machine
+            print(f"Voice capture failed: {e}")
+            self.error = str(e)
+            return None
+
+
+_capture = None
+_capture_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice")
+
+
+def get_voice_capture():
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = VoiceCapture()
+        return _capture
+
+
+def start_voice_capture(capture=None):
+    """Start listening on a background thread; returns a VoiceJob to poll."""
+    job = VoiceJob()
+    job.future = _executor.submit(job._run, capture or get_voice_capture())
+    return job
@@ -0,0 +1,137 @@
+"""Write-behind buffer for per-user state that changes on every chat turn.
+
+Instead of writing the mood log, achievements and user row to disk on each
+turn, the app records what changed here. Pending changes are coalesced per
+(kind, username): appends accumulate, replacements keep the newest value
+and field updates merge, so a burst of turns costs one write per file. A
+background thread flushes everything every WRITE_BEHIND_INTERVAL_SECONDS or
+as soon as WRITE_BEHIND_MAX_PENDING changes have piled up. A user's
+pending changes are flushed on logout and before their data is read back,
+and everything is flushed when the process exits. Writers store JSON
+files through json_store, whose JSON_WRITE_SAFETY setting picks between
+in-place, atomic-rename and fsync'd writes.
+
+Changes still waiting for a flush are lost if the process is killed, so
+at most one interval of updates is at risk.
+"""
+import atexit
+import os
+import threading
+
+WRITE_BEHIND_INTERVAL_SECONDS = float(os.getenv("WRITE_BEHIND_INTERVAL_SECONDS", "5"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "64"))
+
+
+def _append(pending, items):
+    return pending + items
+
+
+def _replace(pending, value):
+    return value
+
+
+def _merge(pending, fields):
+    return {**pending, **fields}
+
+
+class WriteBehind:
+    def __init__(self, interval=WRITE_BEHIND_INTERVAL_SECONDS, max_pending=WRITE_BEHIND_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}  # (kind, username) -> [value, write, merge, changes coalesced into value]
+        self._changes = 0  # Sum of the pending entries' change counts
+        self._condition = threading.Condition()
+        # Held for the whole of a flush so a user's writes never run concurrently or out of order
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+        self.flushes = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _mark(self, kind, username, value, write, merge):
+        with self._condition:
+            entry = self._pending.get((kind, username))
+            if entry is None:
+                self._pending[(kind, username)] = [value, write, merge, 1]
+            else:
+                entry[0] = merge(entry[0], value)
+                entry[3] += 1
+            self._changes += 1
+            if self._changes >= self.max_pending:
+                self._condition.notify()
+
+    def append(self, kind, username, items, write):
+        """Queue items to be added; write(username, items) gets everything queued since the last flush."""
+        self._mark(kind, username, list(items), write, _append)
+
+    def replace(self, kind, username, value, write):
+        """Queue value to be written with write(username, value); only the newest value is written."""
+        self._mark(kind, username, value, write, _replace)
+
+    def update(self, kind, username, fields, write):
+        """Queue field updates; write(username, fields) gets all of them merged, newest first."""
+        self._mark(kind, username, dict(fields), write, _merge)
+
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self, username=None):
+        """Write pending changes now, for one user or for everyone."""
+        with self._flush_lock:
+            with self._condition:
+                keys = [key for key in self._pending if username is None or key[1] == username]
+                batch = [(key, self._pending.pop(key)) for key in keys]
+                self._changes -= sum(changes for _, (_, _, _, changes) in batch)
+            for (kind, user), (value, write, merge, changes) in batch:
+                try:
+                    write(user, value)
+                    self.writes += 1
+                except Exception as e:
+                    print(f"Write-behind flush of {kind} for {user} failed: {e}")
+                    # Put it back in front of anything queued meanwhile, to be retried next flush
+                    with self._condition:
+                        entry = self._pending.get((kind, user))
+                        if entry is None:
+                            self._pending[(kind, user)] = [value, write, merge, changes]
+                        else:
+                            entry[0] = merge(value, entry[0])
+                            entry[3] += changes
+                        self._changes += changes
+            self.flushes += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._stopped and self._changes < self.max_pending:
+                    self._condition.wait(self.interval)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def close(self):
+        """Stop the background thread and write everything still pending."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+
+    def stats(self):
+        with self._condition:
+            return {"pending": len(self._pending), "flushes": self.flushes, "writes": self.writes}
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Return the process-wide buffer, starting its flusher on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = WriteBehind()
+            atexit.register(_buffer.close)
+        return _buffer